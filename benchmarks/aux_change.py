@@ -0,0 +1,83 @@
+"""Time change_parameters_multiple_element_df through COM variants
+(ChangeParametersMultipleElement) and through an aux file, for frames of
+increasing size, to place SAW.AUX_CHANGE_THRESHOLD.
+
+Usage: python benchmarks/aux_change.py [case.pwb]
+
+With a case, the bus names of the case are written back unchanged, so
+the case is not modified; the PowerWorld side is included. Without one,
+a fake SimAuto server that discards the changes is used, which only
+measures the Python side (building the variants or writing the file).
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from gridwb.saw import SAW
+
+FIELDS = ["BusNum", "BusName", "BusNomVolt"]
+
+
+def _fake_saw(nbus: int):
+    from gridwb.testing import FIELDS as FAKE_FIELDS, FakeSimAuto, make_saw
+
+    class NullSimAuto(FakeSimAuto):
+        def ChangeParametersMultipleElement(self, ObjectType, ParamList, ValueList):
+            return ("",)
+
+        def ProcessAuxFile(self, FileName):
+            with open(FileName, "r") as fh:
+                fh.read()
+            return ("",)
+
+    FAKE_FIELDS["bus"].append(("", "BusNomVolt", "Real"))
+    fake = NullSimAuto(nbus)
+    fake.data["bus"]["BusNomVolt"] = ["138.000000"] * nbus
+    return make_saw(fake)[0]
+
+
+def benchmark_aux_change(
+    case: str = None,
+    sizes=(1000, 3000, 10000, 30000, 100000, 120000, 135000, 150000, 300000),
+    repeat: int = 3,
+):
+    """:returns: Dict of (number of values, "variant" or "aux") -> best
+    time in seconds."""
+    saw = SAW(case) if case else _fake_saw(max(sizes) // len(FIELDS) + 1)
+    results = {}
+    try:
+        saw.pw_order = True
+        bus = saw.GetParametersMultipleElement("bus", FIELDS)
+        for size in sizes:
+            rows = size // len(FIELDS)
+            if rows > bus.shape[0]:
+                break
+            df = bus.iloc[:rows]
+            for path, threshold in (("variant", np.inf), ("aux", 0)):
+                saw.AUX_CHANGE_THRESHOLD = threshold
+                best = np.inf
+                for _ in range(repeat):
+                    tic = time.perf_counter()
+                    saw.change_parameters_multiple_element_df("bus", df)
+                    best = min(best, time.perf_counter() - tic)
+                results[df.size, path] = best
+            print(
+                f"{df.size:>8} values: variant {results[df.size, 'variant']:8.3f} s, "
+                f"aux {results[df.size, 'aux']:8.3f} s"
+            )
+    finally:
+        saw.exit()
+    faster = [
+        size
+        for (size, path), t in results.items()
+        if path == "aux" and t < results[size, "variant"]
+    ]
+    if faster:
+        print(f"aux is faster from {min(faster)} values")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_aux_change(*sys.argv[1:2])
@@ -0,0 +1,130 @@
+"""Time SAW.decode_columns against the per-column pd.to_numeric path
+(clean_df_or_series on an object matrix) on recorded SimAuto payloads.
+
+Usage:
+    python benchmarks/decode_columns.py record case.pwb payloads.json.gz
+    python benchmarks/decode_columns.py [payloads.json.gz]
+
+record saves the raw GetParametersMultipleElement output of every field
+of a few object types of a case (run it where PowerWorld is available).
+Without a recording, a synthetic 200k-row branch payload is used.
+"""
+
+import gzip
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+OBJECT_TYPES = ("bus", "branch", "gen", "load")
+
+
+def record(case: str, path: str, object_types=OBJECT_TYPES):
+    """Save the fields (key, name, type) and raw columns of every object
+    type to a gzipped JSON file."""
+    from gridwb.saw import SAW, convert_list_to_variant
+
+    saw = SAW(case)
+    payloads = []
+    try:
+        for object_type in object_types:
+            fields = saw.GetFieldList(object_type)
+            fields = fields[["key_field", "internal_field_name", "field_data_type"]]
+            names = fields["internal_field_name"].tolist()
+            columns = saw._call_simauto(
+                "GetParametersMultipleElement",
+                object_type,
+                convert_list_to_variant(names),
+                "",
+            )
+            payloads.append(
+                {
+                    "ObjectType": object_type,
+                    "fields": fields.values.tolist(),
+                    "columns": [list(c) for c in columns],
+                }
+            )
+    finally:
+        saw.exit()
+    with gzip.open(path, "wt") as fh:
+        json.dump(payloads, fh)
+
+
+def synthetic_payload(rows: int = 200000, seed: int = 0) -> dict:
+    """Branch payload shaped like SimAuto's: padded integer keys, reals
+    with six decimals, a few blanks."""
+    rng = np.random.default_rng(seed)
+    fr = rng.integers(1, 100000, rows)
+    reals = rng.normal(scale=100, size=(5, rows))
+    columns = [
+        [f"{x:>6d}" for x in fr],
+        [f"{x:>6d}" for x in fr + 1],
+        ["1 "] * rows,
+    ] + [[f"{x:.6f}" for x in r] for r in reals]
+    columns[-1][:: rows // 10] = [""] * 10
+    fields = [
+        ("*1*", "BusNum", "Integer"),
+        ("*2*", "BusNum:1", "Integer"),
+        ("*3*", "LineCircuit", "String"),
+    ] + [("", f"Real{i}", "Real") for i in range(5)]
+    return {"ObjectType": "branch", "fields": fields, "columns": columns}
+
+
+def _saw_for(payloads):
+    """SAW on the fake server, knowing the fields of the payloads."""
+    from gridwb.testing import FIELDS, make_saw
+
+    for payload in payloads:
+        FIELDS[payload["ObjectType"].lower()] = [tuple(f) for f in payload["fields"]]
+    return make_saw()[0]
+
+
+def benchmark_decode_columns(path: str = None, repeat: int = 3):
+    """:returns: Dict of (object type, "pd.to_numeric" or
+    "decode_columns") -> best time in seconds."""
+    if path:
+        with gzip.open(path, "rt") as fh:
+            payloads = json.load(fh)
+    else:
+        payloads = [synthetic_payload()]
+    saw = _saw_for(payloads)
+    results = {}
+    try:
+        for payload in payloads:
+            object_type = payload["ObjectType"]
+            columns = payload["columns"]
+            fields = [f[1] for f in payload["fields"]]
+
+            def old():
+                df = pd.DataFrame(np.array(columns, dtype=object).T, columns=fields)
+                return saw.clean_df_or_series(obj=df, ObjectType=object_type)
+
+            def new():
+                return saw.decode_columns(columns, fields, object_type)
+
+            pd.testing.assert_frame_equal(new(), old())
+            for label, func in (("pd.to_numeric", old), ("decode_columns", new)):
+                best = np.inf
+                for _ in range(repeat):
+                    tic = time.perf_counter()
+                    func()
+                    best = min(best, time.perf_counter() - tic)
+                results[object_type, label] = best
+            rows = len(columns[0]) if columns else 0
+            print(
+                f"{object_type:<8} {rows:>7} rows x {len(fields):>3} fields: "
+                f"pd.to_numeric {results[object_type, 'pd.to_numeric']:7.3f} s, "
+                f"decode_columns {results[object_type, 'decode_columns']:7.3f} s"
+            )
+    finally:
+        saw.exit()
+    return results
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["record"]:
+        record(*sys.argv[2:4])
+    else:
+        benchmark_decode_columns(*sys.argv[1:2])
@@ -0,0 +1,44 @@
+"""Time _read_matlab_sparse against the per-statement regular expression
+parser it replaced, on a synthetic Ybus saved in PowerWorld's Matlab
+format.
+
+Usage: python benchmarks/matlab_sparse.py [buses]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from gridwb.saw import _read_matlab_sparse
+from gridwb.testing import legacy_read_matlab_sparse, random_ybus, write_matlab_sparse
+
+
+def benchmark_matlab_sparse(n: int = 100000, seed: int = 0):
+    """:returns: Dict of parser -> entries parsed per second."""
+    ybus = random_ybus(n, seed)
+    fd, path = tempfile.mkstemp(suffix=".m")
+    os.close(fd)
+    rates = {}
+    try:
+        write_matlab_sparse(path, "Ybus", ybus)
+        size = os.path.getsize(path) / 2**20
+        for label, parse in (
+            ("legacy", legacy_read_matlab_sparse),
+            ("_read_matlab_sparse", _read_matlab_sparse),
+        ):
+            tic = time.perf_counter()
+            parse(path, "Ybus", complex)
+            elapsed = time.perf_counter() - tic
+            rates[label] = ybus.nnz / elapsed
+            print(
+                f"{label:>20}: {elapsed:7.3f} s, {rates[label] / 1e6:6.2f} M entries/s "
+                f"({ybus.nnz} entries, {size:.1f} MB)"
+            )
+    finally:
+        os.remove(path)
+    return rates
+
+
+if __name__ == "__main__":
+    benchmark_matlab_sparse(*(int(a) for a in sys.argv[1:2]))
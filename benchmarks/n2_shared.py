@@ -0,0 +1,42 @@
+"""Time n2_enumerate_shared on a synthetic LODF with every pair as a
+candidate, for several numbers of worker processes.
+
+Usage: python benchmarks/n2_shared.py [branches] [workers ...]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from gridwb._contingency import n2_enumerate_shared
+
+
+def benchmark_n2_shared(n: int = 2000, workers=(1, 4, 16, 32), seed: int = 0):
+    """:returns: Dict of number of workers -> time in seconds."""
+    rng = np.random.default_rng(seed)
+    lodf = rng.normal(scale=0.05, size=(n, n))
+    np.fill_diagonal(lodf, -1)
+    f = rng.normal(scale=50, size=n)
+    lim = np.abs(f) * 1.3 + 20
+    A0 = ~np.eye(n, dtype=bool)
+    times = {}
+    for nworkers in workers:
+        tic = time.perf_counter()
+        result, _ = n2_enumerate_shared(lodf, f, lim, A0, nworkers, progress=False)
+        times[nworkers] = time.perf_counter() - tic
+        print(
+            f"{nworkers:>3} workers: {times[nworkers]:8.2f} s, "
+            f"{result.shape[0]} violating pairs of {n * (n - 1) // 2}"
+        )
+    return times
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    if len(args) > 1:
+        benchmark_n2_shared(args[0], args[1:])
+    elif args:
+        benchmark_n2_shared(args[0])
+    else:
+        benchmark_n2_shared()
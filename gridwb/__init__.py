@@ -1,6 +1,11 @@
 """The following are importable from the top-level ``esa`` package:
 
 *   SAW: ESA's primary class
+*   AsyncSAW: asyncio facade running a SAW on its own COM thread
+*   SensitivityMatrix: Sparse thresholded PTDF/LODF container with
+    branch key indexes
+*   ResultStore: Append-only columnar store of contingency analysis
+    results
 *   Error: Base Error class for ESA exceptions. This exception is never
     directly raised.
 *   PowerWorldError: Error class for when PowerWorld/SimAuto reports an
@@ -16,5 +21,8 @@
 # Please keep the docstring above up to date with all the imports.
 from .saw import SAW, PowerWorldError, COMError, CommandNotRespectedError,\
     Error
+from .asaw import AsyncSAW
+from .sensitivity import SensitivityMatrix
+from .results import ResultStore
 
 __version__ = "1.3.5"
@@ -0,0 +1,163 @@
+"""Backend selection for the N-2 bounding kernels.
+
+The kernels come in three forms with the same signatures: pythran
+compiled (performance<major><minor>, built from _performance.py), numba
+parallel (_performance_jit) and NumPy (this module). The first available
+one, in that order, is picked at import time. Set GRIDWB_BOUND_BACKEND to
+pythran, numba or numpy to force a backend, or call select_backend.
+
+Run ``python -m gridwb._bound`` for a micro-benchmark of the backends.
+"""
+
+import importlib
+import os
+import platform
+import time
+import warnings
+
+import numpy as np
+
+BACKENDS = ("pythran", "numba", "numpy")
+KERNELS = ("initialize_bound", "calculate_bound", "pair_bound", "line_bound")
+
+
+def _initialize_bound(bpmax, bpmin, bnmax, bnmin, A):
+    Wbuf1 = A * bpmax[:, None]
+    np.maximum(Wbuf1, A * bpmin[:, None], out=Wbuf1)
+    Wbuf2 = A * bnmax[:, None]
+    np.maximum(Wbuf2, A * bnmin[:, None], out=Wbuf2)
+    w = Wbuf1 + Wbuf1.T
+    np.maximum(w, Wbuf2 + Wbuf2.T, out=w)
+    return w, Wbuf1, Wbuf2
+
+
+def _calculate_bound(bp, bn, Amax1, Amin1, Wbuf1, Wbuf2):
+    w = bp * Amax1
+    np.maximum(w, bp * Amin1, out=w)
+    w += Wbuf1
+    wb2 = bn * Amax1
+    np.maximum(wb2, bn * Amin1, out=wb2)
+    wb2 += Wbuf2
+    return np.maximum(w, wb2, out=w)
+
+
+def _pair_bound(A, bpmax, bpmin, bnmax, bnmin, start, W):
+    rows = slice(start, start + W.shape[0])
+    Ar, Ac = A[rows], A[:, rows].T
+    wp = np.maximum(Ar * bpmax[rows, None], Ar * bpmin[rows, None])
+    wp += np.maximum(Ac * bpmax, Ac * bpmin)
+    wn = np.maximum(Ar * bnmax[rows, None], Ar * bnmin[rows, None])
+    wn += np.maximum(Ac * bnmax, Ac * bnmin)
+    np.maximum(wp, wn, out=W)
+
+
+def _line_bound(bp, bn, Amax1, Amin1, bpmax1, bpmin1, bnmax1, bnmin1, Amax0, Amin0, start, W):
+    rows = slice(start, start + W.shape[0])
+    p, n = bp[rows], bn[rows]
+    wp = np.maximum(p * Amax1, p * Amin1)
+    wp += np.maximum(np.outer(bpmax1[rows], Amax0), np.outer(bpmin1[rows], Amin0))
+    wn = np.maximum(n * Amax1, n * Amin1)
+    wn += np.maximum(np.outer(bnmax1[rows], Amax0), np.outer(bnmin1[rows], Amin0))
+    np.maximum(wp, wn, out=W)
+
+
+def _load(backend: str):
+    """Module (or namespace) providing the kernels of a backend."""
+    if backend == "pythran":
+        major, minor = platform.python_version_tuple()[:2]
+        return importlib.import_module(f".performance{major}{minor}", __package__)
+    if backend == "numba":
+        return importlib.import_module("._performance_jit", __package__)
+    if backend == "numpy":
+        return _NumPy
+    raise ValueError(f"Unknown bound backend {backend!r}. Use one of {BACKENDS}.")
+
+
+class _NumPy(object):
+    initialize_bound = staticmethod(_initialize_bound)
+    calculate_bound = staticmethod(_calculate_bound)
+    pair_bound = staticmethod(_pair_bound)
+    line_bound = staticmethod(_line_bound)
+
+
+def select_backend(backend: str = None) -> str:
+    """Bind the module-level kernels to a backend and return its name.
+
+    :param backend: pythran, numba or numpy. Default is the first one
+        available, in that order.
+    """
+    global BACKEND
+    candidates = BACKENDS if backend is None else (backend,)
+    for name in candidates:
+        try:
+            module = _load(name)
+        except ImportError:
+            if backend is not None:
+                raise
+            continue
+        for kernel in KERNELS:
+            globals()[kernel] = getattr(module, kernel)
+        BACKEND = name
+        return name
+
+
+def _select_from_environment():
+    backend = os.environ.get("GRIDWB_BOUND_BACKEND") or None
+    try:
+        select_backend(backend)
+    except (ImportError, ValueError):
+        warnings.warn(
+            f"Bound backend {backend} is not available. Falling back to the default."
+        )
+        select_backend()
+
+
+BACKEND = None
+initialize_bound = calculate_bound = pair_bound = line_bound = None
+_select_from_environment()
+
+
+def benchmark(sizes=(1000, 5000, 10000), backends=BACKENDS, block: int = None, repeat: int = 3):
+    """Time the phase I and II bounds (pair_bound and line_bound over all
+    row blocks, as n2_fast uses them) for every available backend.
+
+    :returns: Dict of (backend, size) -> best time in seconds.
+    """
+    current = BACKEND
+    rng = np.random.default_rng(0)
+    results = {}
+    try:
+        for n in sizes:
+            A = rng.normal(size=(n, n))
+            bp = rng.normal(size=(n, n))
+            bn = rng.normal(size=(n, n))
+            rows = block or max(2**20 // n, 1)
+            W = np.empty((rows, n))
+            args1 = (bp.max(0), bp.min(0), bn.max(0), bn.min(0))
+            args2 = (A.max(1), A.min(1), bp.max(1), bp.min(1), bn.max(1), bn.min(1), A.max(0), A.min(0))
+            for backend in backends:
+                try:
+                    select_backend(backend)
+                except ImportError:
+                    continue
+                # First call compiles the numba kernels
+                pair_bound(A, *args1, 0, W[:1])
+                line_bound(bp, bn, *args2, 0, W[:1])
+                best = np.inf
+                for _ in range(repeat):
+                    tic = time.perf_counter()
+                    for start in range(0, n, rows):
+                        w = W[: min(rows, n - start)]
+                        pair_bound(A, *args1, start, w)
+                        line_bound(bp, bn, *args2, start, w)
+                    best = min(best, time.perf_counter() - tic)
+                results[backend, n] = best
+                print(f"{backend:<8} {n:>6} branches: {best:8.3f} s")
+            del A, bp, bn
+    finally:
+        select_backend(current)
+    return results
+
+
+if __name__ == "__main__":  # pragma: no cover
+    benchmark()
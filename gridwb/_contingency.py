@@ -0,0 +1,764 @@
+import heapq
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy.sparse import csc_matrix, csr_matrix, issparse
+from tqdm import tqdm
+
+from . import _bound
+from .sensitivity import SensitivityMatrix
+
+# Import numba
+try:  # pragma: no cover
+    import numba as nb
+
+    use_numba = True
+except ImportError:
+    use_numba = False
+
+
+def n1_screen(lodf, f, lim, skip=None, block: int = None, jit: bool = True):
+    """Blocked N-1 screening with a dense LODF matrix.
+
+    Row i of lodf holds the flow change on every branch per unit of flow
+    on outaged branch i, so the flows after outage i are
+    f + lodf[i, :] * f[i]. Outages are evaluated a block of rows at a
+    time, and the margins and violation counts are accumulated in place.
+
+    :param lodf: Dense (outage x branch) LODF matrix, e.g. a numpy.memmap.
+    :param f: Branch flows.
+    :param lim: Branch limits.
+    :param skip: Boolean mask (or 0/1 array) of outages not screened,
+        e.g. the islanding ones.
+    :param block: Number of outages evaluated together by the NumPy path.
+        Default is to keep the work space around 256 kB.
+    :param jit: Use the numba-parallel kernel when numba is installed.
+        Default is True.
+
+    :returns: A tuple of (number of violated branches per outage, worst
+        loading |flow| / lim of every branch, number of outages violating
+        every branch, sparse boolean outage x violated branch matrix).
+    """
+    lodf = np.asarray(lodf)
+    f = np.asarray(f, dtype=float)
+    lim = np.asarray(lim, dtype=float)
+    n = lodf.shape[0]
+    outages = np.arange(n) if skip is None else np.flatnonzero(np.asarray(skip) == 0)
+    jit = jit and use_numba
+    if jit:
+        counts, margins, violations, indptr, indices = _n1_kernel_jit(
+            lodf, f, lim, outages
+        )
+    else:
+        if block is None:
+            block = max(2**15 // max(lodf.shape[1], 1), 1)
+        counts, margins, violations, indptr, indices = _n1_kernel(
+            lodf, f, lim, outages, block
+        )
+    result = csr_matrix(
+        (np.ones(indices.size, dtype=bool), indices, indptr), shape=(n, lodf.shape[1])
+    )
+    return counts, margins, violations, result
+
+
+def _n1_kernel(lodf, f, lim, outages, block):
+    n, m = lodf.shape
+    counts = np.zeros(n, dtype=np.int64)
+    margins = np.zeros(m)
+    violations = np.zeros(m, dtype=np.int64)
+    cols = []
+    # Work space reused by every block
+    flows = np.empty((min(block, outages.size), m))
+    violating = np.empty(flows.shape, dtype=bool)
+    for start in range(0, outages.size, block):
+        blk = outages[start : start + block]
+        fl = flows[: blk.size]
+        vi = violating[: blk.size]
+        np.take(lodf, blk, axis=0, out=fl)
+        fl *= f[blk, None]
+        fl += f
+        np.abs(fl, out=fl)
+        np.greater(fl, lim, out=vi)
+        num = vi.sum(axis=1)
+        counts[blk] = num
+        if num.any():
+            violations += vi.sum(axis=0)
+            cols.append(np.nonzero(vi)[1])
+        np.divide(fl, lim, out=fl)
+        np.maximum(margins, fl.max(axis=0), out=margins)
+    indices = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+    # Blocks are in increasing outage order, so indices are already
+    # grouped by row
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return counts, margins, violations, indptr, indices
+
+
+def _n1_accumulate(lodf, f, lim, outages, counts, margins, violations):  # pragma: no cover
+    # One pass over the matrix. Each chunk of outages accumulates into its
+    # own row of margins and violations, which are reduced afterwards.
+    nchunk = margins.shape[0]
+    size = (outages.size + nchunk - 1) // nchunk
+    for c in nb.prange(nchunk):
+        for o in range(c * size, min((c + 1) * size, outages.size)):
+            i = outages[o]
+            num = 0
+            for j in range(lodf.shape[1]):
+                flow = abs(f[j] + lodf[i, j] * f[i])
+                loading = flow / lim[j]
+                # Same NaN handling as np.maximum
+                if loading > margins[c, j] or loading != loading:
+                    margins[c, j] = loading
+                if flow > lim[j]:
+                    violations[c, j] += 1
+                    num += 1
+            counts[i] = num
+
+
+def _n1_indices(lodf, f, lim, outages, indptr, indices):  # pragma: no cover
+    for o in nb.prange(outages.size):
+        i = outages[o]
+        if indptr[i + 1] == indptr[i]:
+            continue
+        pos = indptr[i]
+        for j in range(lodf.shape[1]):
+            if abs(f[j] + lodf[i, j] * f[i]) > lim[j]:
+                indices[pos] = j
+                pos += 1
+
+
+def _n1_kernel_jit(lodf, f, lim, outages):  # pragma: no cover
+    n, m = lodf.shape
+    nchunk = max(min(nb.get_num_threads(), outages.size), 1)
+    counts = np.zeros(n, dtype=np.int64)
+    margins = np.zeros((nchunk, m))
+    violations = np.zeros((nchunk, m), dtype=np.int64)
+    n1_accumulate(lodf, f, lim, outages, counts, margins, violations)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    indices = np.empty(indptr[-1], dtype=np.int64)
+    n1_indices(lodf, f, lim, outages, indptr, indices)
+    return counts, margins.max(axis=0), violations.sum(axis=0), indptr, indices
+
+
+def n2_prepare(lodf, f, lim, c1_isl, dtype=np.float64, tr: float = 1e-8, block: int = None):
+    """Initial N-2 bounding quantities, computed a block of rows at a time.
+
+    :returns: A tuple of (A0, A, bp, bn, n_c2) where A0 is the boolean
+        mask of candidate pairs, A the pair factors (zero outside A0),
+        bp and bn the scaled LODF with a zero diagonal, and n_c2 the
+        number of entries with lodf[i, j] * lodf[j, i] == 1 (within tr),
+        including the diagonal.
+    """
+    count = lodf.shape[0]
+    if block is None:
+        block = _row_block(count)
+    skip = (np.asarray(c1_isl) == 1) | (abs(f) < tr)
+    A0 = np.ones((count, count), dtype=bool)
+    A0[skip, :] = False
+    A0[:, skip] = False
+    np.fill_diagonal(A0, False)
+    A = np.zeros((count, count), dtype=dtype)
+    bp = np.empty((count, count), dtype=dtype)
+    bn = np.empty((count, count), dtype=dtype)
+    inv_f = 1 / f
+    inv_p = 1 / (lim - f)
+    inv_n = -(1 / (lim + f))
+    n_c2 = 0
+    for start in range(0, count, block):
+        rows = slice(start, min(start + block, count))
+        L = np.asarray(lodf[rows, :], dtype=dtype)
+        qq = L * np.asarray(lodf[:, rows], dtype=dtype).T
+        c2 = abs(qq - 1) <= tr
+        n_c2 += int(c2.sum())
+        a0 = A0[rows]
+        a0 &= ~c2
+        # (1 + f[j] * lodf[i, j] / f[i]) / (1 - lodf[i, j] * lodf[j, i])
+        num = L * inv_f[rows, None].astype(dtype)
+        num *= f.astype(dtype)
+        num += 1
+        qq *= -1
+        qq += 1
+        A[rows][a0] = num[a0] / qq[a0]
+        np.multiply(L, inv_p[rows, None].astype(dtype), out=bp[rows])
+        bp[rows] *= f.astype(dtype)
+        np.multiply(L, inv_n[rows, None].astype(dtype), out=bn[rows])
+        bn[rows] *= f.astype(dtype)
+    np.fill_diagonal(bp, 0)
+    np.fill_diagonal(bn, 0)
+    return A0, A, bp, bn, n_c2
+
+
+def n2_phase1(A0, A, bp, bn, block: int = None, W=None):
+    """Phase I bound: clear the pairs of A0 whose bound
+    max(Wp + Wp.T, Wn + Wn.T) is at most 1, where
+    Wp[i, j] = max(A[i, j] * bp.max(0)[i], A[i, j] * bp.min(0)[i]) and Wn
+    the same with bn. The bound is computed a block of rows at a time by
+    the selected _bound backend, and written to W when given."""
+    count = A.shape[0]
+    if block is None:
+        block = _row_block(count)
+    args = (bp.max(0), bp.min(0), bn.max(0), bn.min(0))
+    buf = np.empty((min(block, count), count), dtype=A.dtype) if W is None else None
+    keep = np.empty_like(A0)
+    for start in range(0, count, block):
+        stop = min(start + block, count)
+        w = W[start:stop] if W is not None else buf[: stop - start]
+        _bound.pair_bound(A, *args, start, w)
+        # The mask is applied once the bound is complete, as it reads
+        # the columns of A as well
+        np.logical_not(w <= 1, out=keep[start:stop])
+    A0 &= keep
+    A[~A0] = 0
+
+
+def n2_phase2(B0, A, bp, bn, block: int = None, W=None):
+    """Phase II bound: clear the entries of B0 (and of bp and bn) whose
+    bound is at most 1, with the bound built from the row and column
+    extremes of A. The bound is computed a block of rows at a time by the
+    selected _bound backend, and written to W when given."""
+    count = A.shape[0]
+    if block is None:
+        block = _row_block(count)
+    args = (
+        A.max(1), A.min(1), bp.max(1), bp.min(1), bn.max(1), bn.min(1), A.max(0), A.min(0)
+    )
+    buf = np.empty((min(block, count), count), dtype=A.dtype) if W is None else None
+    for start in range(0, count, block):
+        stop = min(start + block, count)
+        w = W[start:stop] if W is not None else buf[: stop - start]
+        _bound.line_bound(bp, bn, *args, start, w)
+        b0 = B0[start:stop]
+        b0 &= ~(w <= 1)
+        bp[start:stop][~b0] = 0
+        bn[start:stop][~b0] = 0
+
+
+def n2_enumerate(
+    lodf,
+    f,
+    lim,
+    A0,
+    jit: bool = True,
+    chunk: int = None,
+    progress: bool = True,
+    rows=None,
+    tr: float = 1e-8,
+):
+    """Evaluate every candidate pair (i, j), i < j, of the mask A0.
+
+    The flows after outaging i and j are f - lodf[:, i] * x0 - lodf[:, j] * x1,
+    where (x0, x1) solves the 2x2 system of the pair. Pairs are evaluated
+    in chunks, in parallel with numba when available, and only pairs with
+    violations are kept. Pairs whose system is singular (|det| <= tr, the
+    islanding pairs that n2_prepare removes from A0) are counted, not
+    evaluated.
+
+    :param jit: Use the compiled parallel kernel when numba is installed.
+    :param chunk: Number of pairs per chunk.
+    :param progress: Show a progress bar over the pairs.
+    :param rows: (start, stop) range of rows i to evaluate. Default is all.
+    :param tr: Tolerance on the determinant of the 2x2 systems, as in
+        n2_prepare and nk_screen.
+
+    :returns: A tuple of (int32 array with one (i, j, number of violated
+        branches) row per violating pair in row-major order, number of
+        pairs whose 2x2 system is singular).
+    """
+    lodf = np.asarray(lodf)
+    f = np.asarray(f, dtype=float)
+    lim = np.asarray(lim, dtype=float)
+    count = A0.shape[0]
+    jit = jit and use_numba
+    if chunk is None:
+        chunk = 2**16 if jit else _row_block(count)
+    kernel = n2_pairs if jit else _n2_pairs_numpy
+
+    found = []
+    singular = 0
+    start, stop = rows or (0, count)
+    with tqdm(total=int(np.count_nonzero(A0) // 2), disable=not progress) as bar:
+        for I, J in _candidate_pairs(A0, chunk, start, stop):
+            num = np.empty(I.size, dtype=np.int32)
+            kernel(lodf, f, lim, I, J, tr, num)
+            singular += int(np.count_nonzero(num < 0))
+            hit = num > 0
+            if hit.any():
+                found.append(np.column_stack((I[hit], J[hit], num[hit])).astype(np.int32))
+            bar.update(I.size)
+    result = np.concatenate(found) if found else np.zeros((0, 3), dtype=np.int32)
+    return result, singular
+
+
+def _candidate_pairs(A0, chunk: int, first: int = 0, last: int = None):
+    """Chunks of (I, J) with A0[I, J] and I < J for rows first:last, in
+    row-major order, without copying the whole mask."""
+    last = A0.shape[0] if last is None else last
+    block = _row_block(A0.shape[0])
+    buf_i, buf_j, size = [], [], 0
+    for start in range(first, last, block):
+        stop = min(start + block, last)
+        r, c = np.nonzero(A0[start:stop])
+        r += start
+        upper = c > r
+        buf_i.append(r[upper])
+        buf_j.append(c[upper])
+        size += buf_i[-1].size
+        while size >= chunk or (stop >= last and size):
+            I, J = np.concatenate(buf_i), np.concatenate(buf_j)
+            yield I[:chunk], J[:chunk]
+            buf_i, buf_j = [I[chunk:]], [J[chunk:]]
+            size = buf_i[0].size
+
+
+def n2_enumerate_shared(
+    lodf, f, lim, A0, nworkers: int = None, tasks_per_worker: int = 8, progress: bool = True
+):
+    """Multi-process version of n2_enumerate.
+
+    lodf, f, lim and A0 are copied once into shared memory, which every
+    worker maps without copying. The rows of A0 are split into ranges with
+    about the same number of candidate pairs, handed out to a spawn process
+    pool, and the violating pairs are merged in row order. Each worker runs
+    the numba kernel on a single thread.
+
+    :param nworkers: Number of worker processes (Default: CPU count)
+    :param tasks_per_worker: Row ranges per worker, for load balancing.
+
+    :returns: Same as n2_enumerate.
+    """
+    nworkers = nworkers or multiprocessing.cpu_count()
+    count = A0.shape[0]
+    # Candidate pairs per row, to balance the row ranges
+    per_row = np.zeros(count, dtype=np.int64)
+    block = _row_block(count)
+    for start in range(0, count, block):
+        stop = min(start + block, count)
+        per_row[start:stop] = np.count_nonzero(
+            np.triu(A0[start:stop], start + 1), axis=1
+        )
+    total = int(per_row.sum())
+    bounds = np.searchsorted(
+        np.cumsum(per_row), np.linspace(0, total, nworkers * tasks_per_worker + 1)[1:-1]
+    )
+    edges = np.unique(np.concatenate(([0], bounds, [count])))
+    tasks = list(zip(edges[:-1], edges[1:]))
+
+    segments = []
+    try:
+        specs = []
+        for arr in (lodf, np.asarray(f, dtype=float), np.asarray(lim, dtype=float), A0):
+            arr = np.asarray(arr)
+            shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            segments.append(shm)
+            np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[...] = arr
+            specs.append((shm.name, arr.shape, arr.dtype.str))
+
+        found = []
+        singular = 0
+        # Unlike multiprocessing.Pool, the executor does not respawn a
+        # worker that dies (e.g. in _attach_shared): the pending results
+        # raise BrokenProcessPool instead.
+        with ProcessPoolExecutor(
+            nworkers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_attach_shared,
+            initargs=(specs,),
+        ) as executor:
+            with tqdm(total=total, disable=not progress) as bar:
+                for (start, stop), (res, sing) in zip(
+                    tasks, executor.map(_n2_shared_rows, tasks)
+                ):
+                    found.append(res)
+                    singular += sing
+                    bar.update(int(per_row[start:stop].sum()))
+    finally:
+        for shm in segments:
+            shm.close()
+            shm.unlink()
+    result = np.concatenate(found) if found else np.zeros((0, 3), dtype=np.int32)
+    return result, singular
+
+
+# Arrays (and their shared memory segments) mapped by a worker process
+_shared = []
+
+
+def _attach_shared(specs):
+    if use_numba:  # pragma: no cover
+        nb.set_num_threads(1)
+    for name, shape, dtype in specs:
+        shm = shared_memory.SharedMemory(name=name)
+        _shared.append((shm, np.ndarray(shape, dtype, buffer=shm.buf)))
+
+
+def _n2_shared_rows(rows):
+    lodf, f, lim, A0 = (arr for _, arr in _shared)
+    return n2_enumerate(lodf, f, lim, A0, progress=False, rows=rows)
+
+
+def _n2_pairs(lodf, f, lim, I, J, tr, num):  # pragma: no cover
+    # num is -1 for pairs with a singular 2x2 system
+    length = f.shape[0]
+    for p in nb.prange(I.shape[0]):
+        i = I[p]
+        j = J[p]
+        det = lodf[i, i] * lodf[j, j] - lodf[i, j] * lodf[j, i]
+        if abs(det) <= tr:
+            num[p] = -1
+            continue
+        xq_0 = (lodf[j, j] * f[i] - lodf[i, j] * f[j]) / det
+        xq_1 = (lodf[i, i] * f[j] - lodf[j, i] * f[i]) / det
+        n = 0
+        for k in range(length):
+            f_new = f[k] - lodf[k, i] * xq_0 - lodf[k, j] * xq_1
+            if abs(f_new) > lim[k]:
+                n += 1
+            # The outaged branches are discounted by signed flow only
+            if (k == i or k == j) and f_new > lim[k]:
+                n -= 1
+        num[p] = n
+
+
+def _n2_pairs_numpy(lodf, f, lim, I, J, tr, num):
+    det = lodf[I, I] * lodf[J, J] - lodf[I, J] * lodf[J, I]
+    singular = abs(det) <= tr
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xq_0 = (lodf[J, J] * f[I] - lodf[I, J] * f[J]) / det
+        xq_1 = (lodf[I, I] * f[J] - lodf[J, I] * f[I]) / det
+    f_new = f - lodf[:, I].T * xq_0[:, None]
+    f_new -= lodf[:, J].T * xq_1[:, None]
+    rows = np.arange(I.size)
+    num[:] = np.count_nonzero(abs(f_new) > lim, axis=1)
+    num -= f_new[rows, I] > lim[I]
+    num -= f_new[rows, J] > lim[J]
+    num[singular] = -1
+
+
+def nk_screen(lodf, f, lim, outages, isl=None, monitored=None, tr: float = 1e-8, block: int = None):
+    """Screen outage sets of any size k with the multi-outage LODF.
+
+    For a set S, column lodf[:, i] holds the flow change on every branch
+    per unit of flow on outaged branch i. The flows after outaging S are
+    f - lodf[:, S] @ x, where x solves the k x k system lodf[S, S] x = f[S]
+    (the 2x2 system of n2_enumerate for k = 2). Sets are grouped by size,
+    and the systems of a block of sets are solved together with one
+    batched np.linalg.solve.
+
+    A set islands the system when one of its branches is flagged in isl,
+    or when its k x k system is singular (|det| <= tr). Such sets are not
+    evaluated.
+
+    :param lodf: Dense (branch x outage) LODF matrix, scipy sparse matrix
+        or SensitivityMatrix.
+    :param f: Branch flows.
+    :param lim: Branch limits.
+    :param outages: Outage sets, as a list of sequences of branch
+        positions (e.g. [(3, 7), (1, 4, 9)]) or a (sets x k) int array.
+    :param isl: Boolean mask (or 0/1 array) of the branches whose single
+        outage islands the system. Default is None.
+    :param monitored: Positions of the monitored branches. Default is all.
+    :param tr: Tolerance on the determinant of the k x k systems.
+    :param block: Number of sets evaluated together. Default is to keep
+        the gathered LODF columns around 1M values.
+
+    :returns: A tuple of (number of violated monitored branches per set,
+        worst loading |flow| / lim over the monitored branches per set,
+        boolean mask of the islanding sets, sparse boolean set x monitored
+        branch matrix of the violations). The outaged branches themselves
+        are not counted.
+    """
+    lodf = _column_lodf(lodf)
+    f = np.asarray(f, dtype=float)
+    lim = np.asarray(lim, dtype=float)
+    n = lodf.shape[0]
+    mon = np.arange(n) if monitored is None else np.asarray(monitored, dtype=np.int64)
+    where = None if monitored is None else _monitored_positions(mon, n)
+    flagged = np.zeros(n, dtype=bool) if isl is None else np.asarray(isl) == 1
+    nset, groups = _outage_groups(outages)
+
+    counts = np.zeros(nset, dtype=np.int64)
+    margins = np.zeros(nset)
+    islanding = np.zeros(nset, dtype=bool)
+    rows, cols = [], []
+    for k, (idx, sets) in groups.items():
+        size = block or max(2**20 // max(n * k, 1), 1)
+        for start in range(0, idx.size, size):
+            S = sets[start : start + size]
+            pos = idx[start : start + size]
+            island, ok, flows = _nk_block(lodf, f, S, flagged, mon, where, tr)
+            islanding[pos] = island
+            if not ok.size:
+                continue
+            violated = flows > lim[mon]
+            counts[pos[ok]] = violated.sum(axis=1)
+            margins[pos[ok]] = (flows / lim[mon]).max(axis=1, initial=0)
+            r, c = np.nonzero(violated)
+            rows.append(pos[ok][r])
+            cols.append(c)
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+    result = csr_matrix(
+        (np.ones(rows.size, dtype=bool), (rows, cols)), shape=(nset, mon.size)
+    )
+    return counts, margins, islanding, result
+
+
+def _dense_lodf(lodf) -> np.ndarray:
+    """Dense array of a LODF given as an array, scipy sparse matrix or
+    SensitivityMatrix, in the orientation it is stored in. Sparse input
+    is expanded to count x count values."""
+    if isinstance(lodf, SensitivityMatrix):
+        return lodf.toarray()
+    if issparse(lodf):
+        return lodf.toarray()
+    return np.asarray(lodf)
+
+
+def _column_lodf(lodf):
+    """Dense array or CSC matrix of a (branch x outage) LODF."""
+    if isinstance(lodf, SensitivityMatrix):
+        return lodf.csc
+    if issparse(lodf):
+        return csc_matrix(lodf)
+    return np.asarray(lodf)
+
+
+def _outage_groups(outages):
+    """Number of outage sets, and a dict of set size k -> (positions of
+    the sets, (sets x k) int64 array of their branches)."""
+    if isinstance(outages, np.ndarray) and outages.ndim == 2:
+        sets = outages.astype(np.int64, copy=False)
+        return sets.shape[0], {sets.shape[1]: (np.arange(sets.shape[0]), sets)}
+    outages = [np.asarray(s, dtype=np.int64).ravel() for s in outages]
+    sizes = np.array([s.size for s in outages], dtype=np.int64)
+    if np.any(sizes == 0):
+        raise ValueError("Outage sets must not be empty.")
+    groups = {}
+    for k in np.unique(sizes):
+        idx = np.flatnonzero(sizes == k)
+        groups[int(k)] = (idx, np.array([outages[i] for i in idx]).reshape(-1, k))
+    return len(outages), groups
+
+
+def _monitored_positions(mon, n: int):
+    """Position of every branch among the monitored ones, -1 if not
+    monitored."""
+    where = np.full(n, -1, dtype=np.int64)
+    where[mon] = np.arange(mon.size)
+    return where
+
+
+def _nk_block(lodf, f, S, flagged, mon, where, tr):
+    """Solve the k x k systems of the (sets x k) block S. where is the
+    _monitored_positions of mon, or None when every branch is monitored.
+
+    :returns: A tuple of (islanding mask of the sets, positions of the
+        other sets, |post-outage flow| of those sets on the monitored
+        branches, zero on the outaged ones).
+    """
+    n = lodf.shape[0]
+    b, k = S.shape
+    # LODF columns of every outaged branch of the block, (n, b, k)
+    flat = S.ravel()
+    C = lodf[:, flat].toarray() if issparse(lodf) else np.take(lodf, flat, axis=1)
+    C = C.reshape(n, b, k)
+    # M[s, a, c] = lodf[S[s, a], S[s, c]]
+    M = C[S[:, :, None], np.arange(b)[:, None, None], np.arange(k)]
+    island = flagged[S].any(axis=1)
+    island |= np.abs(np.linalg.det(M)) <= tr
+    ok = np.flatnonzero(~island)
+    if not ok.size:
+        return island, ok, np.zeros((0, mon.size))
+    x = np.linalg.solve(M[ok], f[S[ok]][:, :, None])[:, :, 0]
+    # Post-outage flows, (sets, monitored)
+    Cm = C[:, ok] if where is None else C[mon][:, ok]
+    flows = f[mon] - np.einsum("nsk,sk->sn", Cm, x)
+    # The outaged branches carry no flow
+    out = S[ok] if where is None else where[S[ok]]
+    hit = out >= 0
+    flows[np.nonzero(hit)[0], out[hit]] = 0
+    return island, ok, np.abs(flows, out=flows)
+
+
+def stream_n1(lodf, f, lim, skip=None, block: int = None, cancel=None):
+    """Generator version of n1_screen.
+
+    Yields a (contingency, violated branches, loading) record for every
+    violating outage as soon as its block of outages is evaluated, where
+    contingency is the 1-tuple (i,) of the outage, violated branches the
+    positions of the overloaded branches and loading their |flow| / lim.
+
+    :param lodf: (outage x branch) LODF matrix, as in n1_screen, or a
+        scipy sparse matrix in the same orientation, or a SensitivityMatrix
+        (one column per outage), as n1_fast accepts.
+    :param skip: Boolean mask (or 0/1 array) of outages not screened.
+    :param block: Number of outages per block. Default is to keep the work
+        space around 256 kB.
+    :param cancel: threading.Event (or callable returning True) checked
+        before every block; the generator stops once it is set.
+    """
+    if isinstance(lodf, SensitivityMatrix):
+        lodf = lodf.csc.T.tocsr()
+    elif issparse(lodf):
+        lodf = csr_matrix(lodf)
+    else:
+        lodf = np.asarray(lodf)
+    f = np.asarray(f, dtype=float)
+    lim = np.asarray(lim, dtype=float)
+    n, m = lodf.shape
+    outages = np.arange(n) if skip is None else np.flatnonzero(np.asarray(skip) == 0)
+    if block is None:
+        block = max(2**15 // max(m, 1), 1)
+    for start in range(0, outages.size, block):
+        if _cancelled(cancel):
+            return
+        blk = outages[start : start + block]
+        if issparse(lodf):
+            flows = lodf[blk].toarray()
+        else:
+            flows = np.take(lodf, blk, axis=0)
+        flows *= f[blk, None]
+        flows += f
+        np.abs(flows, out=flows)
+        yield from _records(blk[:, None], flows, lim)
+
+
+def stream_n2(
+    lodf,
+    f,
+    lim,
+    A0,
+    chunk: int = None,
+    jit: bool = True,
+    cancel=None,
+    tr: float = 1e-8,
+):
+    """Generator version of n2_enumerate.
+
+    Every chunk of candidate pairs of A0 is screened by the n2_enumerate
+    kernel, and a (contingency, violated branches, loading) record is
+    yielded for each violating pair (i, j) of the chunk, with the loading
+    recomputed from the solution of its 2x2 system.
+
+    :param lodf: (branch x outage) LODF matrix, as in n2_enumerate. A
+        scipy sparse matrix or SensitivityMatrix is made dense.
+    :param A0: Boolean mask of the candidate pairs.
+    :param chunk: Number of pairs per chunk.
+    :param cancel: threading.Event (or callable returning True) checked
+        before every chunk; the generator stops once it is set.
+    :param tr: Pairs with |det| <= tr island the system and are skipped,
+        as in n2_enumerate.
+    """
+    lodf = _dense_lodf(lodf)
+    f = np.asarray(f, dtype=float)
+    lim = np.asarray(lim, dtype=float)
+    n = A0.shape[0]
+    jit = jit and use_numba
+    if chunk is None:
+        chunk = 2**16 if jit else _row_block(n)
+    kernel = n2_pairs if jit else _n2_pairs_numpy
+    mon = np.arange(n)
+    flagged = np.zeros(n, dtype=bool)
+    for I, J in _candidate_pairs(A0, chunk):
+        if _cancelled(cancel):
+            return
+        num = np.empty(I.size, dtype=np.int32)
+        kernel(lodf, f, lim, I, J, tr, num)
+        hit = num > 0
+        if not hit.any():
+            continue
+        S = np.column_stack((I[hit], J[hit]))
+        # Singular pairs were flagged by the kernel already
+        _, ok, flows = _nk_block(lodf, f, S, flagged, mon, None, tr)
+        yield from _records(S[ok], flows, lim)
+
+
+def stream_nk(
+    lodf,
+    f,
+    lim,
+    outages,
+    isl=None,
+    monitored=None,
+    tr: float = 1e-8,
+    block: int = None,
+    cancel=None,
+):
+    """Generator version of nk_screen.
+
+    Yields a (contingency, violated branches, loading) record for every
+    violating outage set as soon as its block is solved. Sets are
+    processed by size, in their order within each size, and islanding
+    sets are skipped. Violated branches are positions among monitored.
+
+    :param cancel: threading.Event (or callable returning True) checked
+        before every block; the generator stops once it is set.
+    """
+    lodf = _column_lodf(lodf)
+    f = np.asarray(f, dtype=float)
+    lim = np.asarray(lim, dtype=float)
+    n = lodf.shape[0]
+    mon = np.arange(n) if monitored is None else np.asarray(monitored, dtype=np.int64)
+    where = None if monitored is None else _monitored_positions(mon, n)
+    flagged = np.zeros(n, dtype=bool) if isl is None else np.asarray(isl) == 1
+    _, groups = _outage_groups(outages)
+    for k, (_, sets) in groups.items():
+        size = block or max(2**20 // max(n * k, 1), 1)
+        for start in range(0, sets.shape[0], size):
+            if _cancelled(cancel):
+                return
+            S = sets[start : start + size]
+            _, ok, flows = _nk_block(lodf, f, S, flagged, mon, where, tr)
+            yield from _records(S[ok], flows, lim[mon])
+
+
+def worst_contingencies(records, k: int = 10):
+    """Keep the k contingencies with the highest loading of a screening
+    stream in a bounded heap, instead of storing every record.
+
+    :param records: Iterable of (contingency, violated branches, loading)
+        records, e.g. from stream_n2.
+    :param k: Number of contingencies to keep.
+
+    :returns: List of the (up to) k worst records, worst first.
+    """
+    heap = []
+    for seq, record in enumerate(records):
+        # seq breaks ties without comparing the arrays
+        item = (float(record[2].max()), seq, record)
+        if len(heap) < k:
+            heapq.heappush(heap, item)
+        elif item[0] > heap[0][0]:
+            heapq.heapreplace(heap, item)
+    return [record for _, _, record in sorted(heap, key=lambda x: (-x[0], x[1]))]
+
+
+def _records(S, flows, lim):
+    """(contingency, violated branches, loading) of every row of the
+    |flow| block with a violation."""
+    violated = flows > lim
+    for r in np.flatnonzero(violated.any(axis=1)):
+        branches = np.flatnonzero(violated[r])
+        yield tuple(S[r].tolist()), branches, flows[r, branches] / lim[branches]
+
+
+def _cancelled(cancel) -> bool:
+    if cancel is None:
+        return False
+    if hasattr(cancel, "is_set"):
+        return cancel.is_set()
+    return bool(cancel())
+
+
+def _row_block(count: int) -> int:
+    """Rows per block so that a block temporary holds about 1M values."""
+    return max(2**20 // max(count, 1), 1)
+
+
+if use_numba:  # pragma: no cover
+    n1_accumulate = nb.njit(parallel=True, cache=True)(_n1_accumulate)
+    n1_indices = nb.njit(parallel=True, cache=True)(_n1_indices)
+    n2_pairs = nb.njit(parallel=True, cache=True)(_n2_pairs)
@@ -1,35 +1,86 @@
 import numpy as np
 
+# Fused N-2 bounding kernels, compiled ahead of time with pythran into
+# performance<major><minor> (e.g. pythran -fopenmp _performance.py -o
+# performance311.pyd). Each output entry is computed in one pass, without
+# scaled copies of the inputs. _performance_jit holds the numba versions.
 
-# pythran export initialize_bound(float64[], float64[], float64[], float64[], float64[][])
+
+def _max(a, b):
+    # np.maximum semantics: NaN if either value is NaN
+    if a != a:
+        return a
+    if b != b:
+        return b
+    return a if a >= b else b
+
+
+# pythran export initialize_bound(float64[], float64[], float64[], float64[], float64[:,:])
+# pythran export initialize_bound(float32[], float32[], float32[], float32[], float32[:,:])
 def initialize_bound(bpmax, bpmin, bnmax, bnmin, A):
-    bp0 = A.copy()
-    bp1 = A.copy()
-    bn0 = A.copy()
-    bn1 = A.copy()
-    for i in range(len(bpmax)):
-        bp0[i, :] *= bpmax[i]
-        bp1[i, :] *= bpmin[i]
-        bn0[i, :] *= bnmax[i]
-        bn1[i, :] *= bnmin[i]
-    Wbuf1 = np.maximum(bp0, bp1)
-    Wbuf2 = np.maximum(bn0, bn1)
-    w = np.maximum(Wbuf1 + Wbuf1.conj().T, Wbuf2 + Wbuf2.conj().T)
+    n, m = A.shape
+    Wbuf1 = np.empty_like(A)
+    Wbuf2 = np.empty_like(A)
+    w = np.empty_like(A)
+    #omp parallel for
+    for i in range(n):
+        for j in range(m):
+            Wbuf1[i, j] = _max(A[i, j] * bpmax[i], A[i, j] * bpmin[i])
+            Wbuf2[i, j] = _max(A[i, j] * bnmax[i], A[i, j] * bnmin[i])
+    #omp parallel for
+    for i in range(n):
+        for j in range(m):
+            w[i, j] = _max(Wbuf1[i, j] + Wbuf1[j, i], Wbuf2[i, j] + Wbuf2[j, i])
     return w, Wbuf1, Wbuf2
 
 
-# pythran export calculate_bound(float64[][], float64[][], float64[], float64[], float64[][], float64[][])
+# pythran export calculate_bound(float64[:,:], float64[:,:], float64[], float64[], float64[:,:], float64[:,:])
+# pythran export calculate_bound(float32[:,:], float32[:,:], float32[], float32[], float32[:,:], float32[:,:])
 def calculate_bound(bp, bn, Amax1, Amin1, Wbuf1, Wbuf2):
-    bp0 = bp.copy()
-    bp1 = bp.copy()
-    bn0 = bn.copy()
-    bn1 = bn.copy()
-    for i in range(len(Amax1)):
-        bp0[:, i] *= Amax1[i]
-        bp1[:, i] *= Amin1[i]
-        bn0[:, i] *= Amax1[i]
-        bn1[:, i] *= Amin1[i]
-    wb1 = np.maximum(bp0, bp1) + Wbuf1
-    wb2 = np.maximum(bn0, bn1) + Wbuf2
-    w = np.maximum(wb1, wb2)
+    n, m = bp.shape
+    w = np.empty_like(bp)
+    #omp parallel for
+    for i in range(n):
+        for j in range(m):
+            wb1 = _max(bp[i, j] * Amax1[j], bp[i, j] * Amin1[j]) + Wbuf1[i, j]
+            wb2 = _max(bn[i, j] * Amax1[j], bn[i, j] * Amin1[j]) + Wbuf2[i, j]
+            w[i, j] = _max(wb1, wb2)
     return w
+
+
+# pythran export pair_bound(float64[:,:], float64[], float64[], float64[], float64[], int, float64[:,:])
+# pythran export pair_bound(float32[:,:], float32[], float32[], float32[], float32[], int, float32[:,:])
+def pair_bound(A, bpmax, bpmin, bnmax, bnmin, start, W):
+    """Rows start:start + len(W) of the phase I bound of initialize_bound."""
+    rows, m = W.shape
+    #omp parallel for
+    for r in range(rows):
+        i = start + r
+        for j in range(m):
+            wp = _max(A[i, j] * bpmax[i], A[i, j] * bpmin[i]) + _max(
+                A[j, i] * bpmax[j], A[j, i] * bpmin[j]
+            )
+            wn = _max(A[i, j] * bnmax[i], A[i, j] * bnmin[i]) + _max(
+                A[j, i] * bnmax[j], A[j, i] * bnmin[j]
+            )
+            W[r, j] = _max(wp, wn)
+
+
+# pythran export line_bound(float64[:,:], float64[:,:], float64[], float64[], float64[], float64[], float64[], float64[], float64[], float64[], int, float64[:,:])
+# pythran export line_bound(float32[:,:], float32[:,:], float32[], float32[], float32[], float32[], float32[], float32[], float32[], float32[], int, float32[:,:])
+def line_bound(bp, bn, Amax1, Amin1, bpmax1, bpmin1, bnmax1, bnmin1, Amax0, Amin0, start, W):
+    """Rows start:start + len(W) of the phase II bound of calculate_bound,
+    with the outer products of the row extremes of bp and bn and the
+    column extremes of A formed on the fly."""
+    rows, m = W.shape
+    #omp parallel for
+    for r in range(rows):
+        i = start + r
+        for j in range(m):
+            wp = _max(bp[i, j] * Amax1[j], bp[i, j] * Amin1[j]) + _max(
+                bpmax1[i] * Amax0[j], bpmin1[i] * Amin0[j]
+            )
+            wn = _max(bn[i, j] * Amax1[j], bn[i, j] * Amin1[j]) + _max(
+                bnmax1[i] * Amax0[j], bnmin1[i] * Amin0[j]
+            )
+            W[r, j] = _max(wp, wn)
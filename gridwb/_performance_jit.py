@@ -1,48 +1,75 @@
 import numpy as np
+import numba as nb
 
-# Import numba
-try:  # pragma: no cover
-    import numba as nb
-
-    use_numba = True
-except ImportError:
-    use_numba = False
-
-
-def _initialize_bound(bpmax, bpmin, bnmax, bnmin, A):
-    bp0 = A.copy()
-    bp1 = A.copy()
-    bn0 = A.copy()
-    bn1 = A.copy()
-    for i in range(len(bpmax)):
-        bp0[i, :] *= bpmax[i]
-        bp1[i, :] *= bpmin[i]
-        bn0[i, :] *= bnmax[i]
-        bn1[i, :] *= bnmin[i]
-    Wbuf1 = np.maximum(bp0, bp1)
-    Wbuf2 = np.maximum(bn0, bn1)
-    w = np.maximum(Wbuf1 + Wbuf1.conj().T, Wbuf2 + Wbuf2.conj().T)
+# numba versions of the fused kernels in _performance.py, parallel over
+# rows. Importing this module requires numba.
+
+
+@nb.njit(inline="always")
+def _max(a, b):
+    # np.maximum semantics: NaN if either value is NaN
+    if a != a:
+        return a
+    if b != b:
+        return b
+    return a if a >= b else b
+
+
+@nb.njit(parallel=True, cache=True)
+def initialize_bound(bpmax, bpmin, bnmax, bnmin, A):  # pragma: no cover
+    n, m = A.shape
+    Wbuf1 = np.empty_like(A)
+    Wbuf2 = np.empty_like(A)
+    w = np.empty_like(A)
+    for i in nb.prange(n):
+        for j in range(m):
+            Wbuf1[i, j] = _max(A[i, j] * bpmax[i], A[i, j] * bpmin[i])
+            Wbuf2[i, j] = _max(A[i, j] * bnmax[i], A[i, j] * bnmin[i])
+    for i in nb.prange(n):
+        for j in range(m):
+            w[i, j] = _max(Wbuf1[i, j] + Wbuf1[j, i], Wbuf2[i, j] + Wbuf2[j, i])
     return w, Wbuf1, Wbuf2
 
 
-def _calculate_bound(bp, bn, Amax1, Amin1, Wbuf1, Wbuf2):
-    bp0 = bp.copy()
-    bp1 = bp.copy()
-    bn0 = bn.copy()
-    bn1 = bn.copy()
-    for i in range(len(Amax1)):
-        bp0[:, i] *= Amax1[i]
-        bp1[:, i] *= Amin1[i]
-        bn0[:, i] *= Amax1[i]
-        bn1[:, i] *= Amin1[i]
-    wb1 = np.maximum(bp0, bp1) + Wbuf1
-    wb2 = np.maximum(bn0, bn1) + Wbuf2
-    return np.maximum(wb1, wb2)
-
-
-if use_numba:  # pragma: no cover
-    initialize_bound = nb.njit()(_initialize_bound)
-    calculate_bound = nb.njit()(_calculate_bound)
-else:  # pragma: no cover
-    initialize_bound = _initialize_bound
-    calculate_bound = _calculate_bound
+@nb.njit(parallel=True, cache=True)
+def calculate_bound(bp, bn, Amax1, Amin1, Wbuf1, Wbuf2):  # pragma: no cover
+    n, m = bp.shape
+    w = np.empty_like(bp)
+    for i in nb.prange(n):
+        for j in range(m):
+            wb1 = _max(bp[i, j] * Amax1[j], bp[i, j] * Amin1[j]) + Wbuf1[i, j]
+            wb2 = _max(bn[i, j] * Amax1[j], bn[i, j] * Amin1[j]) + Wbuf2[i, j]
+            w[i, j] = _max(wb1, wb2)
+    return w
+
+
+@nb.njit(parallel=True, cache=True)
+def pair_bound(A, bpmax, bpmin, bnmax, bnmin, start, W):  # pragma: no cover
+    rows, m = W.shape
+    for r in nb.prange(rows):
+        i = start + r
+        for j in range(m):
+            wp = _max(A[i, j] * bpmax[i], A[i, j] * bpmin[i]) + _max(
+                A[j, i] * bpmax[j], A[j, i] * bpmin[j]
+            )
+            wn = _max(A[i, j] * bnmax[i], A[i, j] * bnmin[i]) + _max(
+                A[j, i] * bnmax[j], A[j, i] * bnmin[j]
+            )
+            W[r, j] = _max(wp, wn)
+
+
+@nb.njit(parallel=True, cache=True)
+def line_bound(
+    bp, bn, Amax1, Amin1, bpmax1, bpmin1, bnmax1, bnmin1, Amax0, Amin0, start, W
+):  # pragma: no cover
+    rows, m = W.shape
+    for r in nb.prange(rows):
+        i = start + r
+        for j in range(m):
+            wp = _max(bp[i, j] * Amax1[j], bp[i, j] * Amin1[j]) + _max(
+                bpmax1[i] * Amax0[j], bpmin1[i] * Amin0[j]
+            )
+            wn = _max(bn[i, j] * Amax1[j], bn[i, j] * Amin1[j]) + _max(
+                bnmax1[i] * Amax0[j], bnmin1[i] * Amin0[j]
+            )
+            W[r, j] = _max(wp, wn)
@@ -0,0 +1,194 @@
+"""asaw is short for asynchronous SimAuto Wrapper. This module provides
+AsyncSAW, an asyncio facade over SAW.
+
+SimAuto is a COM server, and a COM object must be used from the thread
+(apartment) that created it. AsyncSAW therefore owns its SAW on one
+dedicated worker thread, which initializes COM for itself when the SAW
+is constructed there. Every method call is queued to that thread and
+awaited, so the event loop (and any numpy work scheduled on it) keeps
+running while SimAuto is busy. Calls run one at a time, in the order
+they were made.
+
+Example::
+
+    async with await AsyncSAW.create(r"C:\\case.pwb") as saw:
+        # Start reading the next batch before processing this one.
+        nxt = asyncio.ensure_future(saw.GetParametersMultipleElement("gen", f))
+        process(cur)
+        cur = await nxt
+"""
+
+import asyncio
+import functools
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+from .saw import SAW
+
+
+class AsyncSAW(object):
+    """Run a SAW instance on a dedicated COM thread and expose its
+    methods as coroutines.
+
+    Any SAW method can be awaited under the same name, e.g.
+    ``await asaw.GetParametersMultipleElement("bus", ["BusNum"])``.
+    Plain attributes and properties are read on the COM thread as well,
+    and have to be awaited, e.g. ``await asaw.pw_order``.
+
+    Generator methods become asynchronous iterators and context manager
+    methods asynchronous context managers, still driven on the COM
+    thread::
+
+        async for record in asaw.stream_contingency_analysis("N-1"):
+            ...
+        async with asaw.ctg_solve_chunks(ctg, ctg_ele) as chunks:
+            async for result in chunks:
+                ...
+    """
+
+    def __init__(self, FileName, *args, **kwargs):
+        """Start the COM thread and open the case. This blocks until the
+        case is open; use AsyncSAW.create from a coroutine.
+
+        All arguments are passed to SAW. Pass ``dispatch`` to inject a
+        COM object, e.g. a fake SimAuto server for testing.
+        """
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="SimAuto"
+        )
+        try:
+            self._saw = self._executor.submit(SAW, FileName, *args, **kwargs).result()
+        except BaseException:
+            self._executor.shutdown(wait=False)
+            raise
+
+    @classmethod
+    async def create(cls, FileName, *args, **kwargs) -> "AsyncSAW":
+        """Create an AsyncSAW without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(cls, FileName, *args, **kwargs)
+        )
+
+    async def run(self, func, *args, **kwargs):
+        """Run func(saw, *args, **kwargs) on the COM thread. Use this to
+        group several SAW calls into one queued request."""
+        return await self._submit(func, self._saw, *args, **kwargs)
+
+    async def call(self, func: str, *args):
+        """Awaitable version of SAW._call_simauto."""
+        return await self._submit(self._saw._call_simauto, func, *args)
+
+    async def close(self):
+        """Close the case, release COM on its thread and stop the
+        thread."""
+        if self._saw is None:
+            return
+        try:
+            await self._submit(self._saw.exit)
+        finally:
+            self._saw = None
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _submit(self, func, *args, **kwargs) -> asyncio.Future:
+        future = self._executor.submit(func, *args, **kwargs)
+        return asyncio.wrap_future(future)
+
+    def __getattr__(self, name):
+        # Only called for names not found on AsyncSAW itself.
+        if name.startswith("_"):
+            raise AttributeError(name)
+        saw = self.__dict__.get("_saw")
+        if saw is None:
+            raise AttributeError(f"{name} (AsyncSAW is closed)")
+
+        # Methods become coroutine functions bound to the COM thread.
+        func = getattr(type(saw), name, None)
+        if inspect.isfunction(func):
+            method = getattr(saw, name)
+
+            # Generators and context managers (contextlib.contextmanager
+            # keeps the generator function as __wrapped__) run their body
+            # as they are advanced, entered and exited, so those steps are
+            # sent to the COM thread instead of the call itself.
+            if inspect.isgeneratorfunction(func):
+
+                @functools.wraps(method)
+                def iterate(*args, **kwargs):
+                    return _AsyncIterator(self, method(*args, **kwargs))
+
+                return iterate
+            if inspect.isgeneratorfunction(getattr(func, "__wrapped__", None)):
+
+                @functools.wraps(method)
+                def manage(*args, **kwargs):
+                    return _AsyncContextManager(self, method(*args, **kwargs))
+
+                return manage
+
+            @functools.wraps(method)
+            async def wrapper(*args, **kwargs):
+                return await self._submit(method, *args, **kwargs)
+
+            return wrapper
+
+        # Attributes and properties may touch COM as well, so they are
+        # read on the COM thread too, without blocking the caller:
+        # ``await asaw.pw_order``.
+        return self.run(getattr, name)
+
+
+# Returned by next() on the COM thread when a generator is exhausted, as
+# StopIteration cannot be set on a future.
+_DONE = object()
+
+
+class _AsyncIterator(object):
+    """Asynchronous iterator over a SAW generator, advanced on the COM
+    thread. Creating the generator does not run any of its code."""
+
+    def __init__(self, asaw: AsyncSAW, iterator):
+        self._asaw = asaw
+        self._iterator = iterator
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await self._asaw._submit(next, self._iterator, _DONE)
+        if item is _DONE:
+            raise StopAsyncIteration
+        return item
+
+    async def aclose(self):
+        """Close the generator on the COM thread, e.g. to stop early."""
+        close = getattr(self._iterator, "close", None)
+        if close is not None:
+            await self._asaw._submit(close)
+
+
+class _AsyncContextManager(object):
+    """Asynchronous context manager entering and exiting a SAW context
+    manager on the COM thread. A generator it provides is wrapped in an
+    _AsyncIterator."""
+
+    def __init__(self, asaw: AsyncSAW, manager):
+        self._asaw = asaw
+        self._manager = manager
+
+    async def __aenter__(self):
+        value = await self._asaw._submit(self._manager.__enter__)
+        if inspect.isgenerator(value):
+            value = _AsyncIterator(self._asaw, value)
+        return value
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return await self._asaw._submit(
+            self._manager.__exit__, exc_type, exc_val, exc_tb
+        )
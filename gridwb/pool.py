@@ -0,0 +1,238 @@
+"""ScenarioPool fans scenarios out to worker processes, each with its own
+SimAuto connection. It only needs the workbench for its default opener,
+and is also available as gridwb.workbench.core.ScenarioPool.
+"""
+
+import multiprocessing
+import threading
+from multiprocessing.connection import wait
+from typing import Any, Callable, Iterable, Iterator
+
+
+class WorkerCrashException(Exception):
+    '''Raised when a scenario keeps crashing pool workers'''
+    pass
+
+
+def open_powerworld(fname: str):
+    '''Default worker opener: a PowerWorldIO connected to its own SimAuto instance.'''
+    from .workbench.core.powerworld import PowerWorldIO
+
+    io = PowerWorldIO(fname)
+    io.open()
+    return io
+
+
+def _close(io):
+    '''Release the SimAuto instance of a worker's io object, if it has one.'''
+    esa = getattr(io, 'esa', None)
+    if esa is not None:
+        esa.exit()
+
+
+def _worker(conn, opener, fname):
+    '''
+    Worker Loop. Opens the case once, then runs (index, func, item) tasks
+    until a None task is received. Every task is answered with
+    (index, ok, result) where result is the exception when ok is False.
+    The io object is closed however the loop ends.
+    '''
+    io = None
+    try:
+        io = opener(fname)
+        while True:
+            try:
+                task = conn.recv()
+            except (EOFError, OSError):
+                # Pool closed our pipe while we were idle (restart)
+                break
+            if task is None:
+                break
+            idx, func, item = task
+            try:
+                reply = (idx, True, func(io, item))
+            except Exception as e:
+                reply = (idx, False, e)
+            try:
+                conn.send(reply)
+            except OSError:
+                # Pool closed our pipe (restart or abandoned iteration)
+                break
+            except Exception as e:
+                # Result or exception could not be pickled
+                conn.send((idx, False, RuntimeError(repr(e))))
+    finally:
+        try:
+            if io is not None:
+                _close(io)
+        finally:
+            conn.close()
+
+
+class ThreadBackend:
+    '''
+    In-process stand-in for a multiprocessing context. Workers run as threads
+    and talk over the same pipes, so pool logic can be exercised with stub
+    openers and without SimAuto. Not useful for real parallel work.
+    '''
+
+    Pipe = staticmethod(multiprocessing.Pipe)
+
+    class Process(threading.Thread):
+
+        def __init__(self, target, args, daemon=True):
+            super().__init__(target=target, args=args, daemon=daemon)
+
+        def terminate(self):
+            pass
+
+
+class ScenarioPool:
+    '''
+    Pool of worker processes, each with its own SimAuto connection opened on
+    the same case. Scenarios or contingencies are handed out one at a time
+    to whichever worker is free, and results are returned in input order.
+    A worker that dies is restarted and its scenario is retried.
+
+    Example:
+    def solve_ctg(io, ctg):
+        io.esa.RunScriptCommand(f"CTGApply({ctg})")
+        ...
+        return meta, df
+
+    with ScenarioPool('case.pwb', nworkers=8) as pool:
+        for meta, df in pool.imap(solve_ctg, ctgs):
+            ...
+
+    Functions and items must be picklable: use module-level functions.
+    Each worker keeps its case between tasks, so functions should leave
+    the case as they found it (e.g. with save_state/restore_state).
+    '''
+
+    def __init__(self, fname: str, nworkers: int = None, opener: Callable = open_powerworld, backend=None, retries: int = 1):
+        '''
+        Parameters:
+        fname: Path of the .pwb case opened by every worker
+        nworkers: Number of workers (Default: CPU count)
+        opener: Picklable callable fname -> io object passed to tasks (Default: PowerWorldIO)
+        backend: Object providing Process and Pipe, e.g. a multiprocessing context (Default: spawn) or ThreadBackend
+        retries: Times a scenario is retried after crashing a worker before raising WorkerCrashException
+        '''
+        self.fname = fname
+        self.nworkers = nworkers or multiprocessing.cpu_count()
+        self.opener = opener
+        self.backend = backend or multiprocessing.get_context('spawn')
+        self.retries = retries
+        self.restarts = 0
+
+        # Worker Slot -> (Process, Connection)
+        self._workers = [self._start() for _ in range(self.nworkers)]
+
+    def _start(self):
+        '''Launch one worker and return (process, parent connection)'''
+        parent, child = self.backend.Pipe()
+        proc = self.backend.Process(target=_worker, args=(child, self.opener, self.fname), daemon=True)
+        proc.start()
+
+        # Parent's copy of the child end must be closed so a dead worker reads as EOF
+        if not isinstance(proc, threading.Thread):
+            child.close()
+
+        return proc, parent
+
+    def _restart(self, slot: int):
+        proc, conn = self._workers[slot]
+        conn.close()
+        proc.terminate()
+        proc.join(timeout=5)
+        self._workers[slot] = self._start()
+        self.restarts += 1
+
+    def imap(self, func: Callable[[Any, Any], Any], items: Iterable) -> Iterator:
+        '''
+        Apply func(io, item) to each item across the workers.
+        Results are yielded in the order of items as soon as they are available.
+        An exception raised by func is re-raised here when its result is reached.
+        '''
+        items = list(items)
+        pending = iter(range(len(items)))
+        results = {}
+        crashes = {}
+        busy = {}   # Slot -> Item Index
+        nextout = 0
+
+        def assign(slot, idx=None):
+            if idx is None:
+                idx = next(pending, None)
+            if idx is not None:
+                busy[slot] = idx
+                try:
+                    self._workers[slot][1].send((idx, func, items[idx]))
+                except OSError:
+                    # Worker already gone. Its pipe reads as EOF below.
+                    pass
+
+        try:
+            for slot in range(self.nworkers):
+                assign(slot)
+
+            while nextout < len(items):
+
+                # Stream everything that is complete and in order
+                while nextout in results:
+                    ok, res = results.pop(nextout)
+                    nextout += 1
+                    if not ok:
+                        raise res
+                    yield res
+                if nextout >= len(items):
+                    break
+
+                # Wait for any worker to answer (or die)
+                conns = {self._workers[s][1]: s for s in busy}
+                for conn in wait(list(conns)):
+                    slot = conns[conn]
+                    try:
+                        idx, ok, res = conn.recv()
+                    except (EOFError, OSError):
+                        # Worker died: restart and retry its scenario
+                        idx = busy.pop(slot)
+                        crashes[idx] = crashes.get(idx, 0) + 1
+                        self._restart(slot)
+                        if crashes[idx] > self.retries:
+                            results[idx] = (False, WorkerCrashException(f'Worker crashed on item {idx}: {items[idx]!r}'))
+                            assign(slot)
+                        else:
+                            assign(slot, idx)
+                        continue
+                    del busy[slot]
+                    results[idx] = (ok, res)
+                    assign(slot)
+        finally:
+            # Abandoned iteration: workers still running tasks cannot be reused safely
+            for slot in list(busy):
+                self._restart(slot)
+
+    def map(self, func: Callable[[Any, Any], Any], items: Iterable) -> list:
+        '''Apply func(io, item) to each item across the workers and return the results as a list.'''
+        return list(self.imap(func, items))
+
+    def close(self):
+        '''Stop all workers'''
+        for proc, conn in self._workers:
+            try:
+                conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for proc, conn in self._workers:
+            proc.join(timeout=30)
+            if proc.is_alive():
+                proc.terminate()
+            conn.close()
+        self._workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,318 @@
+"""Append-only columnar store for contingency analysis results.
+
+Every run appends one violation record per (contingency, overloaded
+branch) to chunk directories of column files (.npy), which are never
+modified once written. A query memory-maps the columns and reads only
+the rows it needs, so months of nightly runs can be searched without
+loading them. Layout of a store directory::
+
+    catalog.json                  runs and chunks
+    branches.json                 branch labels, by branch id
+    contingencies_indptr.npy      branch ids of every contingency id,
+    contingencies_branches.npy    in CSR form
+    chunks/<n>/<column>.npy       contingency, branch, flow, limit,
+                                  loading
+    chunks/<n>/<index>.npy        ctg_ids/ctg_start and
+                                  branch_ids/branch_start/branch_order
+
+Rows of a chunk are sorted by contingency and then branch, so the rows
+of one contingency are contiguous. The rows of one branch are found
+through branch_order.
+
+Example::
+
+    with ResultStore("ca_results") as store:
+        saw.archive_contingency_analysis(store, "N-2", label="nightly")
+    store = ResultStore("ca_results")
+    df = store.query(branch="1 2 1")
+"""
+
+import datetime
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = {
+    "contingency": np.int64,
+    "branch": np.int32,
+    "flow": np.float64,
+    "limit": np.float64,
+    "loading": np.float64,
+}
+
+
+class ResultStore(object):
+    """Chunked columnar store of contingency violation records.
+
+    Branches are identified by labels, e.g. "BusNum BusNum:1 LineCircuit",
+    so results stay comparable when the branch order of a case changes.
+    A contingency is the set of its outaged branches.
+    """
+
+    def __init__(self, path, chunk_size: int = 2**20):
+        """
+        :param path: Directory of the store. It is created if needed.
+        :param chunk_size: Maximum number of records per chunk.
+        """
+        self.path = os.fspath(path)
+        self.chunk_size = chunk_size
+        os.makedirs(os.path.join(self.path, "chunks"), exist_ok=True)
+        catalog = self._file("catalog.json")
+        if os.path.exists(catalog):
+            with open(catalog, "r") as fh:
+                self.catalog = json.load(fh)
+        else:
+            self.catalog = {"runs": [], "chunks": []}
+        labels = self._file("branches.json")
+        self.branches = []
+        if os.path.exists(labels):
+            with open(labels, "r") as fh:
+                self.branches = json.load(fh)
+        self._branch_ids = {label: i for i, label in enumerate(self.branches)}
+        self.contingencies = []
+        if os.path.exists(self._file("contingencies_indptr.npy")):
+            indptr = np.load(self._file("contingencies_indptr.npy"))
+            members = np.load(self._file("contingencies_branches.npy"))
+            self.contingencies = [
+                tuple(members[indptr[i] : indptr[i + 1]].tolist())
+                for i in range(indptr.size - 1)
+            ]
+        self._ctg_ids = {c: i for i, c in enumerate(self.contingencies)}
+        self._buffer = None
+        self._buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _file(self, *names) -> str:
+        return os.path.join(self.path, *names)
+
+    def runs(self) -> pd.DataFrame:
+        """One row per run with its id, label, option, time and number of
+        records."""
+        columns = ["run", "label", "option", "time", "records"]
+        df = pd.DataFrame(self.catalog["runs"], columns=columns)
+        df["time"] = pd.to_datetime(df["time"])
+        return df
+
+    def start_run(self, label: str = "", option: str = "", time=None) -> int:
+        """Start a new run. Records appended until the next start_run or
+        close belong to it.
+
+        :returns: The id of the run.
+        """
+        self.flush()
+        run = len(self.catalog["runs"])
+        time = time or datetime.datetime.now()
+        self.catalog["runs"].append(
+            {
+                "run": run,
+                "label": label,
+                "option": option,
+                "time": time.isoformat(timespec="seconds"),
+                "records": 0,
+            }
+        )
+        self._buffer = {name: [] for name in COLUMNS}
+        self._buffered = 0
+        return run
+
+    def append(self, records, labels, lim):
+        """Append screening records to the current run.
+
+        :param records: Iterable of (contingency, violated branches,
+            loading) records, as yielded by
+            SAW.stream_contingency_analysis, with branch positions.
+        :param labels: Label of every branch position.
+        :param lim: Limit of every branch position. Flows are stored as
+            |flow| = loading * limit.
+
+        :returns: Number of records appended.
+        """
+        if self._buffer is None:
+            self.start_run()
+        labels = np.asarray([self._branch_id(label) for label in labels])
+        lim = np.asarray(lim, dtype=float)
+        count = 0
+        for contingency, branches, loading in records:
+            members = tuple(sorted(labels[list(contingency)].tolist()))
+            ctg = self._ctg_ids.get(members)
+            if ctg is None:
+                ctg = self._ctg_ids[members] = len(self.contingencies)
+                self.contingencies.append(members)
+            limit = lim[branches]
+            self._buffer["contingency"].append(np.full(len(branches), ctg))
+            self._buffer["branch"].append(labels[branches])
+            self._buffer["flow"].append(loading * limit)
+            self._buffer["limit"].append(limit)
+            self._buffer["loading"].append(loading * 100)
+            count += len(branches)
+            self._buffered += len(branches)
+            if self._buffered >= self.chunk_size:
+                self._write_chunk()
+        self.catalog["runs"][-1]["records"] += count
+        return count
+
+    def flush(self):
+        """Write the buffered records of the current run, the branch and
+        contingency dictionaries and the catalog."""
+        if self._buffer is not None:
+            self._write_chunk()
+        with open(self._file("branches.json.tmp"), "w") as fh:
+            json.dump(self.branches, fh)
+        os.replace(self._file("branches.json.tmp"), self._file("branches.json"))
+        sizes = [len(c) for c in self.contingencies]
+        indptr = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=indptr[1:])
+        members = np.fromiter(
+            (b for c in self.contingencies for b in c), dtype=np.int64, count=indptr[-1]
+        )
+        _save(self._file("contingencies_branches.npy"), members)
+        _save(self._file("contingencies_indptr.npy"), indptr)
+        with open(self._file("catalog.json.tmp"), "w") as fh:
+            json.dump(self.catalog, fh, indent=1)
+        os.replace(self._file("catalog.json.tmp"), self._file("catalog.json"))
+
+    def close(self):
+        """Flush the current run. Records appended afterwards start a new
+        run."""
+        self.flush()
+        self._buffer = None
+
+    def query(self, contingency=None, branch=None, runs=None) -> pd.DataFrame:
+        """Records of a contingency and/or a monitored branch.
+
+        Only the index of every chunk and the matching rows are read.
+
+        :param contingency: Label of one outaged branch, or a sequence of
+            labels of the outaged branches. Default is any.
+        :param branch: Label of the monitored branch. Default is any.
+        :param runs: Run ids to search. Default is every run.
+
+        :returns: DataFrame with the run, contingency (labels joined by
+            " & "), branch, flow, limit and loading (percent) of every
+            matching record.
+        """
+        ctg = branch_id = None
+        if contingency is not None:
+            if isinstance(contingency, str):
+                contingency = [contingency]
+            members = tuple(sorted(self._branch_ids.get(c, -1) for c in contingency))
+            ctg = self._ctg_ids.get(members, -1)
+        if branch is not None:
+            branch_id = self._branch_ids.get(branch, -1)
+        runs = None if runs is None else set(np.atleast_1d(runs).tolist())
+
+        frames = []
+        for chunk in self.catalog["chunks"]:
+            if runs is not None and chunk["run"] not in runs:
+                continue
+            if ctg is not None and not chunk["ctg_min"] <= ctg <= chunk["ctg_max"]:
+                continue
+            rows = self._chunk_rows(chunk["name"], ctg, branch_id)
+            if rows is not None and not rows.size:
+                continue
+            data = {"run": chunk["run"]}
+            for name in COLUMNS:
+                col = np.load(self._file("chunks", chunk["name"], f"{name}.npy"), mmap_mode="r")
+                data[name] = np.asarray(col if rows is None else col[rows])
+            frames.append(pd.DataFrame(data))
+        if not frames:
+            frames.append(
+                pd.DataFrame({"run": np.zeros(0, dtype=np.int64)}).assign(
+                    **{name: np.zeros(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+                )
+            )
+        df = pd.concat(frames, ignore_index=True)
+        labels = np.asarray(self.branches, dtype=object)
+        df["contingency"] = [
+            " & ".join(labels[list(self.contingencies[c])]) for c in df["contingency"]
+        ]
+        df["branch"] = labels[df["branch"].to_numpy()]
+        return df
+
+    def _chunk_rows(self, name: str, ctg, branch_id):
+        """Sorted rows of a chunk matching the filters, None for all."""
+        def load(index):
+            return np.load(self._file("chunks", name, f"{index}.npy"), mmap_mode="r")
+
+        rows = None
+        if ctg is not None:
+            ids, start = load("ctg_ids"), load("ctg_start")
+            i = np.searchsorted(ids, ctg)
+            if i == ids.size or ids[i] != ctg:
+                return np.zeros(0, dtype=np.int64)
+            rows = np.arange(start[i], start[i + 1])
+        if branch_id is not None:
+            ids, start = load("branch_ids"), load("branch_start")
+            i = np.searchsorted(ids, branch_id)
+            if i == ids.size or ids[i] != branch_id:
+                return np.zeros(0, dtype=np.int64)
+            match = np.sort(load("branch_order")[start[i] : start[i + 1]])
+            rows = match if rows is None else np.intersect1d(rows, match)
+        return rows
+
+    def _branch_id(self, label) -> int:
+        label = str(label)
+        i = self._branch_ids.get(label)
+        if i is None:
+            i = self._branch_ids[label] = len(self.branches)
+            self.branches.append(label)
+        return i
+
+    def _write_chunk(self):
+        buffer = self._buffer
+        if not buffer["branch"]:
+            return
+        data = {
+            name: np.concatenate(buffer[name]).astype(dtype, copy=False)
+            for name, dtype in COLUMNS.items()
+        }
+        for values in buffer.values():
+            values.clear()
+        self._buffered = 0
+        order = np.lexsort((data["branch"], data["contingency"]))
+        data = {name: values[order] for name, values in data.items()}
+        name = f"{len(self.catalog['chunks']):06d}"
+        folder = self._file("chunks", name)
+        os.makedirs(folder, exist_ok=True)
+        for column, values in data.items():
+            _save(os.path.join(folder, f"{column}.npy"), values)
+        ctg_ids, ctg_start = _offsets(data["contingency"])
+        branch_order = np.argsort(data["branch"], kind="stable")
+        branch_ids, branch_start = _offsets(data["branch"][branch_order])
+        for index, values in (
+            ("ctg_ids", ctg_ids),
+            ("ctg_start", ctg_start),
+            ("branch_ids", branch_ids),
+            ("branch_start", branch_start),
+            ("branch_order", branch_order),
+        ):
+            _save(os.path.join(folder, f"{index}.npy"), values)
+        self.catalog["chunks"].append(
+            {
+                "name": name,
+                "run": self.catalog["runs"][-1]["run"],
+                "rows": int(order.size),
+                "ctg_min": int(ctg_ids[0]),
+                "ctg_max": int(ctg_ids[-1]),
+            }
+        )
+
+
+def _offsets(values: np.ndarray):
+    """Unique values of a sorted array and the start of each, with the
+    end as the last start."""
+    ids, start = np.unique(values, return_index=True)
+    return ids, np.append(start, values.size)
+
+
+def _save(path: str, values: np.ndarray):
+    # Write then rename, so a reader never sees a partial file
+    np.save(path + ".tmp.npy", values)
+    os.replace(path + ".tmp.npy", path)
@@ -0,0 +1,225 @@
+"""Sparse container for branch sensitivity matrices (PTDF, LODF, shift
+factors) with branch key indexes and O(nnz) flow update kernels.
+
+Factors below a tolerance are dropped, and the rest is stored column by
+column (CSC), so the effect of one outage or injection is a contiguous
+slice. A row-wise (CSR) copy is built on first use.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csc_matrix, issparse
+
+
+class SensitivityMatrix(object):
+    """Thresholded sparse sensitivity matrix.
+
+    Rows are monitored branches and columns are outaged branches (LODF)
+    or injections (shift factors), as in the tables PowerWorld returns.
+    Matrices with one row per outaged branch, such as
+    SAW.get_lodf_matrix_fast, are read with transpose=True.
+
+    Example::
+
+        lodf = SensitivityMatrix(saw.get_lodf_matrix_fast(), transpose=True,
+                                 rows=keys, columns=keys, tol=1e-4)
+        post = lodf.post_outage_flows(f, lodf.column_position((1, 2, "1")))
+    """
+
+    def __init__(
+        self,
+        values,
+        rows=None,
+        columns=None,
+        isl=None,
+        tol: float = 1e-6,
+        transpose: bool = False,
+        block: int = 1024,
+    ):
+        """
+        :param values: Dense array (also a numpy.memmap), scipy sparse
+            matrix or DataFrame.
+        :param rows: Keys of the rows, as a DataFrame of key fields or
+            anything pandas accepts as an Index. Default is positions.
+        :param columns: Keys of the columns. Default is positions.
+        :param isl: Boolean mask of the columns (outages) that island the
+            system. These are skipped by the contingency kernels.
+        :param tol: Factors with an absolute value at or below tol are
+            dropped.
+        :param transpose: Set to True if values has one row per outage.
+        :param block: Number of columns thresholded at a time for dense
+            input, which bounds the extra memory used.
+        """
+        if isinstance(values, pd.DataFrame):
+            values = values.to_numpy(dtype=float)
+        self.tol = tol
+        self.csc = _threshold(values, tol, transpose, block)
+        self._csr = None
+        nrow, ncol = self.csc.shape
+        self.rows = _key_index(rows, nrow)
+        self.columns = _key_index(columns, ncol)
+        self.isl = (
+            np.zeros(ncol, dtype=bool) if isl is None else np.asarray(isl, dtype=bool)
+        )
+        if self.isl.shape != (ncol,):
+            raise ValueError(f"isl has shape {self.isl.shape}, expected ({ncol},).")
+
+    @property
+    def shape(self):
+        return self.csc.shape
+
+    @property
+    def nnz(self) -> int:
+        return self.csc.nnz
+
+    @property
+    def csr(self):
+        """Row-wise copy of the matrix, built on first use."""
+        if self._csr is None:
+            self._csr = self.csc.tocsr()
+        return self._csr
+
+    def toarray(self) -> np.ndarray:
+        return self.csc.toarray()
+
+    def row_position(self, key) -> int:
+        """Position of the row with the given branch key."""
+        return self.rows.get_loc(key)
+
+    def column_position(self, key) -> int:
+        """Position of the column with the given branch key."""
+        return self.columns.get_loc(key)
+
+    def row(self, key) -> np.ndarray:
+        """Dense row (e.g. the factors of a monitored branch) by key."""
+        return self.csr[self.row_position(key)].toarray().ravel()
+
+    def column(self, key) -> np.ndarray:
+        """Dense column (e.g. the factors of an outage) by key."""
+        return self.csc[:, self.column_position(key)].toarray().ravel()
+
+    def column_entries(self, k: int):
+        """Row positions and values of the stored factors of column k."""
+        start, stop = self.csc.indptr[k], self.csc.indptr[k + 1]
+        return self.csc.indices[start:stop], self.csc.data[start:stop]
+
+    def flow_changes(self, f: np.ndarray, k: int):
+        """Flow changes caused by outage k, only where a factor is stored.
+
+        :returns: Row positions and the change of flow on each.
+        """
+        idx, val = self.column_entries(k)
+        return idx, val * f[k]
+
+    def post_outage_flows(self, f: np.ndarray, k: int) -> np.ndarray:
+        """f + LODF[:, k] * f[k], updating only the stored entries."""
+        flows = np.array(f, dtype=float)
+        idx, delta = self.flow_changes(f, k)
+        flows[idx] += delta
+        return flows
+
+    def contingency_violations(
+        self, f: np.ndarray, lim: np.ndarray, outages=None
+    ):
+        """Screen the outages of all (or the given) columns at once.
+
+        The flows after outage k are f + LODF[:, k] * f[k]. Only stored
+        entries are evaluated; every other branch keeps its base flow,
+        whose violations are counted once.
+
+        :param f: Base flow of every row branch.
+        :param lim: Limit of every row branch.
+        :param outages: Column positions or boolean mask to screen.
+            Default is every column not flagged in isl.
+
+        :returns: A tuple of (number of violated branches per screened
+            outage, worst loading |flow| / lim of every branch over the
+            screened outages, number of screened outages violating each
+            branch).
+        """
+        f = np.asarray(f, dtype=float)
+        lim = np.asarray(lim, dtype=float)
+        nrow, ncol = self.shape
+        if outages is None:
+            outages = np.flatnonzero(~self.isl)
+        else:
+            outages = np.asarray(outages)
+            if outages.dtype == bool:
+                outages = np.flatnonzero(outages)
+        nout = outages.size
+
+        sub = self.csc[:, outages]
+        counts = np.diff(sub.indptr)
+        col = np.repeat(np.arange(nout), counts)
+        idx = sub.indices
+        flows = f[idx] + sub.data * f[outages][col]
+        loading = np.abs(flows) / lim[idx]
+        violated = loading > 1
+
+        base_loading = np.abs(f) / lim
+        base_violated = base_loading > 1
+
+        # Per outage: base violations, corrected on the stored entries
+        per_outage = (
+            base_violated.sum()
+            - np.bincount(col, weights=base_violated[idx], minlength=nout)
+            + np.bincount(col, weights=violated, minlength=nout)
+        ).astype(int)
+
+        # Per branch: stored entries, plus the base state for every
+        # outage with no factor on the branch
+        stored = np.bincount(idx, minlength=nrow)
+        margins = np.zeros(nrow)
+        np.maximum.at(margins, idx, loading)
+        unchanged = stored < nout
+        margins[unchanged] = np.maximum(margins[unchanged], base_loading[unchanged])
+        per_branch = np.bincount(idx, weights=violated, minlength=nrow) + np.where(
+            base_violated, nout - stored, 0
+        )
+        return per_outage, margins, per_branch.astype(int)
+
+
+def _threshold(values, tol: float, transpose: bool, block: int) -> csc_matrix:
+    """CSC matrix of the entries of values with |v| > tol."""
+    if issparse(values):
+        mat = csc_matrix(values.T if transpose else values, dtype=float, copy=True)
+        mat.data[np.abs(mat.data) <= tol] = 0
+        mat.eliminate_zeros()
+        mat.sort_indices()
+        return mat
+
+    if not isinstance(values, np.ndarray):
+        values = np.asarray(values)
+    nrow, ncol = values.shape[::-1] if transpose else values.shape
+    data, indices = [], []
+    indptr = np.zeros(ncol + 1, dtype=np.int64)
+    for start in range(0, ncol, block):
+        stop = min(start + block, ncol)
+        # Column block of the (possibly transposed) input, in memory
+        chunk = np.asarray(values[start:stop, :] if transpose else values[:, start:stop].T)
+        keep = np.abs(chunk) > tol
+        r, c = np.nonzero(keep)
+        data.append(chunk[r, c].astype(float))
+        indices.append(c)
+        indptr[start + 1 : stop + 1] = np.cumsum(keep.sum(axis=1)) + indptr[start]
+    data = np.concatenate(data) if data else np.zeros(0)
+    indices = np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64)
+    return csc_matrix((data, indices, indptr), shape=(nrow, ncol))
+
+
+def _key_index(keys, n: int) -> pd.Index:
+    """Index of row or column keys. DataFrames of key fields become a
+    MultiIndex, so a branch is looked up as (BusNum, BusNum:1, LineCircuit)."""
+    if keys is None:
+        return pd.RangeIndex(n)
+    if isinstance(keys, pd.DataFrame):
+        index = (
+            pd.MultiIndex.from_frame(keys)
+            if keys.shape[1] > 1
+            else pd.Index(keys.iloc[:, 0])
+        )
+    else:
+        index = pd.Index(keys)
+    if len(index) != n:
+        raise ValueError(f"Expected {n} keys, got {len(index)}.")
+    return index
@@ -0,0 +1,6 @@
+"""
+Fakes and fixtures shared by the tests and the benchmarks.
+"""
+
+from .fake_simauto import FIELDS, FakeSimAuto, make_saw
+from .matlab import legacy_read_matlab_sparse, random_ybus, write_matlab_sparse
@@ -0,0 +1,220 @@
+"""In-process stand-in for the SimAuto COM object, for the tests and
+benchmarks that drive SAW through its dispatch argument on any platform.
+
+Data is held as PowerWorld returns it: one tuple of strings per field.
+Only what the tests and benchmarks need is implemented.
+"""
+
+import re
+
+import numpy as np
+
+FIELDS = {
+    "bus": [
+        ("*1*", "BusNum", "Integer"),
+        ("", "BusName", "String"),
+        ("", "BusPUVolt", "Real"),
+        ("", "BusAngle", "Real"),
+        ("", "BusCat", "String"),
+        ("", "BusNetMW", "Real"),
+    ],
+    "branch": [
+        ("*1*", "BusNum", "Integer"),
+        ("*2*", "BusNum:1", "Integer"),
+        ("*3*", "LineCircuit", "String"),
+        ("", "LineX", "Real"),
+        ("", "LineR", "Real"),
+        ("", "LineStatus", "String"),
+        ("", "Status", "String"),
+        ("", "MWFrom", "Real"),
+        ("", "LineLimMVA", "Real"),
+        ("", "BranchDeviceType", "String"),
+        ("", "Selected", "String"),
+    ],
+    "gen": [("*1*", "BusNum", "Integer"), ("*2*", "GenID", "String"), ("", "GenMW", "Real")],
+    "load": [("*1*", "BusNum", "Integer"), ("*2*", "LoadID", "String"), ("", "LoadMW", "Real")],
+    "shunt": [("*1*", "BusNum", "Integer"), ("*2*", "ShuntID", "String")],
+    "contingency": [("*1*", "Name", "String"), ("", "Skip", "String"), ("", "Solved", "String"),
+                    ("", "Violations", "Integer")],
+    "contingencyelement": [("*1*", "Contingency", "String"), ("*2*", "Object", "String"),
+                           ("", "Action", "String")],
+}
+
+
+class FakeSimAuto(object):
+    """Fake SimAuto server with a ring-and-chord network of nbus buses."""
+
+    def __init__(self, nbus: int = 6, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.calls = []
+        self.scripts = []
+        self.filters = {}
+        self.UIVisible = False
+        self.CreateIfNotFound = False
+        fr = list(range(1, nbus)) + list(range(1, nbus - 1))
+        to = list(range(2, nbus + 1)) + list(range(3, nbus + 1))
+        m = len(fr)
+        self.data = {
+            "bus": {
+                "BusNum": [str(i) for i in range(1, nbus + 1)],
+                "BusName": [f"Bus{i}" for i in range(1, nbus + 1)],
+                "BusPUVolt": ["1.000000"] * nbus,
+                "BusAngle": [f"{-0.5 * i:.6f}" for i in range(nbus)],
+                "BusCat": ["Slack"] + ["PQ"] * (nbus - 1),
+                "BusNetMW": [f"{10.0 * i:.6f}" for i in range(nbus)],
+            },
+            "branch": {
+                "BusNum": [str(x) for x in fr],
+                "BusNum:1": [str(x) for x in to],
+                "LineCircuit": ["1"] * m,
+                "LineX": [f"{0.05 + 0.01 * rng.random():.6f}" for _ in range(m)],
+                "LineR": ["0.010000"] * m,
+                "LineStatus": ["Closed"] * m,
+                "Status": ["Closed"] * m,
+                "MWFrom": [f"{rng.normal() * 50:.6f}" for _ in range(m)],
+                "LineLimMVA": ["200.000000"] * m,
+                "BranchDeviceType": ["Line"] * m,
+                "Selected": ["NO"] * m,
+            },
+            "gen": {"BusNum": ["1"], "GenID": ["1"], "GenMW": ["100.0"]},
+            "load": {"BusNum": ["2"], "LoadID": ["1"], "LoadMW": ["20"]},
+            "shunt": {"BusNum": [], "ShuntID": []},
+            "contingency": {"Name": [], "Skip": [], "Solved": [], "Violations": []},
+            "contingencyelement": {"Contingency": [], "Object": [], "Action": []},
+        }
+
+    def _table(self, ObjectType):
+        return self.data[ObjectType.lower()]
+
+    def OpenCase(self, FileName):
+        self.calls.append(("OpenCase", FileName))
+        return ("",)
+
+    def CloseCase(self):
+        self.calls.append(("CloseCase",))
+        return ("",)
+
+    def GetFieldList(self, ObjectType):
+        self.calls.append(("GetFieldList", ObjectType))
+        rows = [(k, n, t, "desc", n) for k, n, t in FIELDS[ObjectType.lower()]]
+        return ("", tuple(rows))
+
+    def GetParametersSingleElement(self, ObjectType, ParamList, Values):
+        self.calls.append(("GetParametersSingleElement", ObjectType))
+        if ObjectType.lower() == "powerworldsession":
+            return ("", ("22.0.0 Build", "45000"))
+        return ("", tuple("1" for _ in ParamList.value))
+
+    def GetParametersMultipleElement(self, ObjectType, ParamList, FilterName):
+        self.calls.append(("GetParametersMultipleElement", ObjectType, FilterName))
+        table = self._table(ObjectType)
+        rows = range(len(next(iter(table.values()))))
+        rows = [r for r in rows if self._match(table, r, FilterName)]
+        if not rows:
+            return ("", None)
+        return ("", tuple(tuple(table[p][r] for r in rows) for p in ParamList.value))
+
+    def _match(self, table, row, FilterName):
+        # Advanced filters with one 'Field "=" "value"' condition, defined
+        # by an aux file, or inline "Field = value" filters
+        if FilterName in self.filters:
+            field, value = self.filters[FilterName]
+        elif not FilterName or "=" not in FilterName:
+            return True
+        else:
+            field, value = (x.strip() for x in FilterName.split("=", 1))
+        return table[field][row] == value.strip('"')
+
+    def ListOfDevices(self, ObjectType, FilterName):
+        self.calls.append(("ListOfDevices", ObjectType))
+        table = self._table(ObjectType)
+        keys = [n for k, n, _ in FIELDS[ObjectType.lower()] if k]
+        rows = range(len(next(iter(table.values()))))
+        rows = [r for r in rows if self._match(table, r, FilterName)]
+        return ("", tuple(tuple(table[p][r] for r in rows) for p in keys))
+
+    def ChangeParametersMultipleElement(self, ObjectType, ParamList, ValueList):
+        params = list(ParamList.value)
+        values = [list(v.value) for v in ValueList]
+        self.calls.append(("ChangeParametersMultipleElement", ObjectType, params, values))
+        self._change(ObjectType, params, values)
+        return ("",)
+
+    def _change(self, ObjectType, params, values):
+        # Upsert by key fields, as with CreateIfNotFound. Only the
+        # contingency tables get new rows.
+        create = ObjectType.lower() in ("contingency", "contingencyelement")
+        table = self._table(ObjectType)
+        keys = [n for k, n, _ in FIELDS[ObjectType.lower()] if k]
+        count = len(next(iter(table.values())))
+        for row in values:
+            item = dict(zip(params, (str(v) for v in row)))
+            match = [
+                r for r in range(count) if all(table[k][r] == item[k] for k in keys)
+            ]
+            if match:
+                for field, value in item.items():
+                    table[field][match[0]] = value
+            elif create:
+                for field in table:
+                    table[field].append(item.get(field, "NO" if field == "Skip" else ""))
+                count += 1
+
+    def RunScriptCommand(self, Statements):
+        self.calls.append(("RunScriptCommand", Statements))
+        self.scripts.append(Statements)
+        if Statements.upper().startswith("CALCULATELODFMATRIX"):
+            self._calculate_lodf(*Statements[Statements.index("(") + 1 : -1].split(","))
+        if Statements.upper().startswith("CTGSOLVEALL"):
+            table = self.data["contingency"]
+            for r, skip in enumerate(table["Skip"]):
+                if skip == "NO":
+                    table["Solved"][r] = "YES"
+                    table["Violations"][r] = str(r)
+        return ("",)
+
+    def _calculate_lodf(self, action, process, monitor, ignore_open, *args):
+        # LODFMult:c of every branch for the c-th processed outage, in
+        # percent: -100 for the outaged branch itself, and the made-up
+        # "row.outage" otherwise (e.g. 3.5 for branch 3 and outage 5).
+        table = self.data["branch"]
+        outages = [
+            r
+            for r in range(len(table["BusNum"]))
+            if self._selects(table, r, process)
+            and not (ignore_open == "YES" and table["Status"][r] == "Open")
+        ]
+        for c, o in enumerate(outages):
+            table[f"LODFMult:{c}"] = [
+                "-100.000000" if r == o else f"{r + o / 10:.6f}"
+                for r in range(len(table["BusNum"]))
+            ]
+
+    def _selects(self, table, row, which):
+        if which == "ALL":
+            return True
+        if which == "SELECTED":
+            return table["Selected"][row] == "YES"
+        return self._match(table, row, which.strip('"'))
+
+    def ProcessAuxFile(self, FileName):
+        with open(FileName, "r") as fh:
+            self.last_aux = fh.read()
+        self.calls.append(("ProcessAuxFile", self.last_aux))
+        match = re.search(
+            r'"\w+" "(\w+)" "AND".*<SUBDATA Condition>\s*(\w+) "=" "(\w*)"',
+            self.last_aux,
+            re.S,
+        )
+        if match:
+            self.filters[match[1]] = (match[2], match[3])
+        return ("",)
+
+
+def make_saw(fake: FakeSimAuto = None, **kwargs):
+    """SAW (and its fake server) opened on a fake case."""
+    from gridwb.saw import SAW
+
+    fake = fake or FakeSimAuto()
+    kwargs.setdefault("metadata_cache", False)
+    return SAW("case.pwb", dispatch=lambda name: fake, **kwargs), fake
@@ -0,0 +1,69 @@
+"""Matlab sparse files as PowerWorld saves them, and the regular
+expression parser SAW used for them before _read_matlab_sparse.
+"""
+
+import re
+
+import numpy as np
+from scipy.sparse import csr_matrix, random as sparse_random
+
+
+def legacy_read_matlab_sparse(path, name: str, dtype=float) -> csr_matrix:
+    """The parser get_ybus and get_jacobian used before
+    _read_matlab_sparse: one regular expression match per statement."""
+    with open(path, "r") as f:
+        f.readline()
+        mat_str = f.read()
+    mat_str = re.sub(r"\s", "", mat_str)
+    lines = re.split(";", mat_str)
+    ie = r"[0-9]+"
+    fe = r"-*[0-9]+\.[0-9]+"
+    dr = re.compile(r"(?:{name})=(?:sparse\()({ie})".format(name=name, ie=ie))
+    if np.dtype(dtype).kind == "c":
+        exp = re.compile(
+            r"(?:{name}\()({ie}),({ie})(?:\)=)({fe})(?:\+j\*)(?:\()({fe})".format(
+                name=name, ie=ie, fe=fe
+            )
+        )
+    else:
+        exp = re.compile(
+            r"(?:{name}\()({ie}),({ie})(?:\)=)({fe})".format(name=name, ie=ie, fe=fe)
+        )
+    n = int(dr.match(lines[0])[1])
+    row, col, data = [], [], []
+    for line in lines[1:]:
+        match = exp.match(line)
+        if match is None:
+            continue
+        groups = match.groups()
+        row.append(int(groups[0]))
+        col.append(int(groups[1]))
+        value = float(groups[2])
+        if len(groups) == 4:
+            value += 1j * float(groups[3])
+        data.append(value)
+    return csr_matrix(
+        (data, (np.asarray(row) - 1, np.asarray(col) - 1)), shape=(n, n), dtype=dtype
+    )
+
+
+def write_matlab_sparse(path, name: str, matrix, extra: str = ""):
+    """Write matrix the way PowerWorld saves a Ybus (complex) or a
+    Jacobian (real) in Matlab format."""
+    coo = matrix.tocoo()
+    with open(path, "w") as f:
+        f.write("j = sqrt(-1);\n")
+        f.write(f"{name} = sparse({matrix.shape[0]});\n")
+        f.write(extra)
+        for i, j, v in zip(coo.row + 1, coo.col + 1, coo.data):
+            if np.iscomplexobj(coo.data):
+                f.write(f"{name}({i},{j})={v.real:.6f}+j*({v.imag:.6f});\n")
+            else:
+                f.write(f"{name}({i},{j})={v:.6f};\n")
+
+
+def random_ybus(n: int, seed: int = 0) -> csr_matrix:
+    rng = np.random.default_rng(seed)
+    real = sparse_random(n, n, density=min(1.0, 5 / n), random_state=rng, format="coo")
+    values = real.data * 20 - 10 + 1j * (rng.random(real.nnz) * 40 - 20)
+    return csr_matrix((values, (real.row, real.col)), shape=(n, n))
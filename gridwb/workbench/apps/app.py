@@ -116,10 +116,11 @@ def griditer(func):
             scenario: dict[Condition, Any] = dict(
                 zip(app.conditions.keys(), scenarioVals)
             )
-            for condition, value in scenario.items():
-                condition.apply(app.io, scenario)
+            with app.io.esa.script_batch():
+                for condition, value in scenario.items():
+                    condition.apply(app.io, scenario)
 
-                print(condition.text + " : " + str(value))
+                    print(condition.text + " : " + str(value))
 
             # Retrieve Application Dataframe
             inner_meta, inner_df = func(app, *args, **kwargs)
@@ -454,10 +454,11 @@ class GIC(PWApp):
         obj = GICInputVoltObject.TYPE
         fields = ['WhoAmI'] + [f'GICObjectInputDCVolt:{i+1}' for i in range(csv.columns.size-1)]
 
-        # Send Field Data
-        for row in csv.to_records(False):
-            cmd = fcmd(obj, fields, list(row)).replace("'", "")
-            self.io.esa.RunScriptCommand(cmd)
+        # Send Field Data (Queued and sent together)
+        with self.io.esa.script_batch():
+            for row in csv.to_records(False):
+                cmd = fcmd(obj, fields, list(row)).replace("'", "")
+                self.io.esa.RunScriptCommand(cmd)
 
         print("GIC Time Varying Data Uploaded")
     
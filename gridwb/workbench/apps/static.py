@@ -388,15 +388,16 @@ class Statics(PWApp):
         #   1 2  3*    <- push()  State 3 added (sidx = 3) and 0 was deleted
         #     2  3  4* <- push()  State 4 added (sidx = 4) and 1 was deleted
 
-        # Save current state on the right of the queue
-        self.stateidx += 1
-        self.io.save_state(f'GWBState{self.stateidx}')
+        # Save current state on the right of the queue (Store & Delete sent together)
+        with self.io.esa.script_batch():
+            self.stateidx += 1
+            self.io.save_state(f'GWBState{self.stateidx}')
 
-        if verbose: print(f'Pushed States -> {self.stateidx},  Delete -> {self.stateidx-self.maxstates}')
+            if verbose: print(f'Pushed States -> {self.stateidx},  Delete -> {self.stateidx-self.maxstates}')
 
-        # Try and delete the state (nmax) behind this one
-        if self.stateidx >= self.maxstates:
-            self.io.delete_state(f'GWBState{self.stateidx-self.maxstates}')
+            # Try and delete the state (nmax) behind this one
+            if self.stateidx >= self.maxstates:
+                self.io.delete_state(f'GWBState{self.stateidx-self.maxstates}')
 
     def istore(self, n:int=0, verbose=False):
         '''
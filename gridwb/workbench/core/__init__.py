@@ -1,2 +1,3 @@
 from .context import Context
-from .powerworld import PowerWorldIO
\ No newline at end of file
+from .powerworld import PowerWorldIO
+from ...pool import ScenarioPool, ThreadBackend
@@ -1,5 +1,6 @@
 from typing import Type
-from pandas import DataFrame
+from contextlib import contextmanager
+from pandas import DataFrame, concat
 from os import path
 from numpy import unique
 
@@ -17,6 +18,19 @@ fexcept = lambda t: "3" + t[5:] if t[:5] == "Three" else t
 class PowerWorldIO(IModelIO):
     esa: SAW
 
+    def __init__(self, fname: str = None):
+        super().__init__(fname)
+
+        # Read-through cache of object data: TYPE -> (stamp, DataFrame)
+        # The stamp is the SAW generation, so anything that may change
+        # the case (solve, script, edit, state restore) invalidates it.
+        self._cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Writes queued by batch(): GObject type -> list of DataFrames
+        self._pending = None
+
     def TSInit(self):
         ''' Initialize Transient Stability Parameters '''
         try:
@@ -67,7 +81,7 @@ class PowerWorldIO(IModelIO):
             return None
 
         # Retrieve data from unique list of fields
-        df = self.esa.GetParametersMultipleElement(gtype.TYPE, unique_fields)
+        df = self._read(gtype.TYPE, unique_fields)
 
         # Set Index of DF if key field exists and DF valid
         #if df is not None and len(key_fields)>0:
@@ -75,10 +89,70 @@ class PowerWorldIO(IModelIO):
         
         return df
     
+    def _read(self, objtype: str, fields: list[str], flush: bool = True) -> DataFrame | None:
+        '''
+        Read fields of all objects of a type, served from the cache when the
+        case has not changed since the fields were last read. Fields read
+        separately for the same type are merged into one cached frame.
+        Always returns a copy, so callers may modify the result.
+
+        Inside batch(), writes queued for the type are sent first (unless
+        flush is False), so the read sees them.
+        '''
+        if flush and self._pending:
+            self._flush(objtype)
+
+        stamp = (self.esa.generation, self.esa.pw_order)
+        cached = self._cache.get(objtype)
+
+        # Hit: Same case state and every field already present
+        if cached is not None and cached[0] == stamp:
+            df = cached[1]
+            if df is None:
+                self.cache_hits += 1
+                return None
+            if all(f in df.columns for f in fields):
+                self.cache_hits += 1
+                return df[list(fields)].copy()
+        else:
+            cached = None
+
+        # Miss: Read from Power World
+        self.cache_misses += 1
+        df = self.esa.GetParametersMultipleElement(objtype, fields)
+
+        # Extend the cached frame when the shared (key) columns line up
+        if cached is not None and cached[1] is not None and df is not None:
+            old = cached[1]
+            common = [c for c in df.columns if c in old.columns]
+            if len(old) == len(df) and common and old[common].equals(df[common]):
+                new = [c for c in df.columns if c not in old.columns]
+                merged = concat([old, df[new].set_axis(old.index)], axis=1)
+                self._cache[objtype] = (stamp, merged)
+                return df
+
+        self._cache[objtype] = (stamp, None if df is None else df.copy())
+        return df
+
+    def invalidate(self):
+        '''Drop all cached object data.'''
+        self._cache.clear()
+
+    def cache_info(self) -> dict:
+        '''Hit/Miss counts and number of cached object types.'''
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'types': len(self._cache),
+        }
+
     def __setitem__(self, args, value) -> None:
         '''Set grid data using indexors directly to Power World
         Must be atleast 2 args: Type & Field
 
+        Only the key fields and the assigned fields of the selected records
+        are sent. Inside a batch() block the write is queued instead.
+
         Examples:
         wb.pw[Bus, 'BusPUVolt'] = 1
         wb.pw[Bus, v<1, 'BusPUVolt'] = arr
@@ -88,9 +162,6 @@ class PowerWorldIO(IModelIO):
         # Type checking is an anti-pattern but this is accepted within community as a necessary part of the magic function
         # Extract Arguments depending on Index Method
 
-        # Ensure Edit Mode
-        self.edit_mode()
-
         # PARSE ARGUMENT FORMAT OPTIONS
 
         # Limited Data Passed NOTE useful when target data is not a properly named DF
@@ -107,17 +178,34 @@ class PowerWorldIO(IModelIO):
             # Format fields passed as list
             if isinstance(fields, str): 
                 fields = fields,
-            
-            # Retrieve active power world records with keys only
-            base = self[gtype,:]
+            fields = list(fields)
 
-            # Assign Values based on index
-            if where is not None: base.loc[where, fields] = value
-            else: base.loc[:,fields] = value
+            # Retrieve active power world records with keys only (Keyless types have no records to select by)
+            # Keys are not changed by queued writes, so those are left queued
+            base = self._read(gtype.TYPE, list(gtype.keys) or fields, flush=False)
+
+            # Only the key and assigned columns are sent
+            for f in fields:
+                if f not in base.columns: base[f] = None
+
+            # Assign Values based on index and keep only the assigned records
+            if where is not None: 
+                base.loc[where, fields] = value
+                base = base.loc[where]
+            else: 
+                base.loc[:,fields] = value
 
         # [Type] -> Try and Create New (Requires properly formatted df)
         else: 
             gtype, base = args, value
+
+        # Queue while batching
+        if self._pending is not None:
+            self._queue(gtype, base)
+            return
+
+        # Ensure Edit Mode
+        self.edit_mode()
             
         # Send to Power World
         self.esa.change_parameters_multiple_element_df(gtype.TYPE, base)
@@ -125,6 +213,82 @@ class PowerWorldIO(IModelIO):
         # Enter back into run mode
         self.run_mode()
 
+    @contextmanager
+    def batch(self):
+        '''
+        Group writes made through indexors into a single edit session.
+        Writes to the same object type are merged and sent when the block
+        exits. Reading an object type inside the block sends its queued
+        writes first, so reads always see them. If the block raises, the
+        writes still queued are discarded.
+
+        Example:
+        with wb.io.batch():
+            wb.io[Gen, 'GenMW'] = p
+            wb.io[Gen, 'GenMVR'] = q
+        '''
+
+        # Nested batches join the outer one
+        if self._pending is not None:
+            yield
+            return
+
+        self._pending = {}
+        self.edit_mode()
+        try:
+            yield
+            self._flush()
+        finally:
+            self._pending = None
+            self.run_mode()
+
+    def _flush(self, objtype: str = None):
+        '''Send the writes queued by batch(), only those of objtype if given.'''
+        for gtype in list(self._pending):
+            if objtype is None or gtype.TYPE == objtype:
+                for df in self._pending.pop(gtype):
+                    self.esa.change_parameters_multiple_element_df(gtype.TYPE, df)
+
+    def _queue(self, gtype, df: DataFrame):
+        '''
+        Queue a write, merging it into the previous write of the same type
+        when they cover the same fields (later rows win), a subset of its
+        fields and records (updated in place) or the same records (later
+        fields win).
+        '''
+        pending = self._pending.setdefault(gtype, [])
+        keys = [k for k in gtype.keys if k in df.columns]
+
+        if pending:
+            last = pending[-1]
+
+            # Same Fields -> Stack Records
+            if set(last.columns)==set(df.columns):
+                if len(keys)>0:
+                    merged = concat([last, df[last.columns]], ignore_index=True)
+                    pending[-1] = merged.drop_duplicates(keys, keep='last')
+                else:
+                    pending[-1] = df
+                return
+
+            # Subset of Fields and Records -> Overwrite in place
+            if len(keys)>0 and set(df.columns)<=set(last.columns):
+                merged, update = last.set_index(keys), df.set_index(keys)
+                if update.index.isin(merged.index).all():
+                    merged.loc[update.index, update.columns] = update
+                    pending[-1] = merged.reset_index()[last.columns]
+                    return
+
+            # Same Records -> Combine Fields
+            a, b = last[keys].reset_index(drop=True), df[keys].reset_index(drop=True)
+            if len(a)==len(b) and a.equals(b):
+                merged = last.reset_index(drop=True)
+                for f in df.columns:
+                    if f not in keys: merged[f] = df[f].to_numpy()
+                pending[-1] = merged
+                return
+
+        pending.append(df)
 
     def save(self):
         '''
@@ -158,7 +322,7 @@ class PowerWorldIO(IModelIO):
         df = None
         try:
             # Successful retrieval of data and requested fields as DataFrame
-            df = self.esa.GetParametersMultipleElement(gtype.TYPE, fields)
+            df = self._read(gtype.TYPE, fields)
         except:
             # Failure. Create empty dataframe with expected indecies.
             print(f"Failed to read {gtype.TYPE} data.")
@@ -199,7 +363,7 @@ class PowerWorldIO(IModelIO):
         # Get Data from Power World 
         df = None
         try:
-            df = self.esa.GetParametersMultipleElement(gtype.TYPE, request)
+            df = self._read(gtype.TYPE, request)
         except:
             print(f"Failed to read {gtype.TYPE} data.")
         
@@ -350,22 +514,25 @@ class PowerWorldIO(IModelIO):
         '''
         Store a state under an alias and restore it later.
         '''
-        self.run_mode()
-        self.esa.RunScriptCommand(f'StoreState({statename});')
+        with self.esa.script_batch():
+            self.run_mode()
+            self.esa.RunScriptCommand(f'StoreState({statename});')
 
     def restore_state(self, statename="GWB"):
         '''
         Restore a saved state.
         '''
-        self.run_mode()
-        self.esa.RunScriptCommand(f'RestoreState(USER,{statename});')
+        with self.esa.script_batch():
+            self.run_mode()
+            self.esa.RunScriptCommand(f'RestoreState(USER,{statename});')
 
     def delete_state(self, statename="GWB"):
         '''
         Restore a saved state.
         '''
-        self.esa.RunScriptCommand('EnterMode(RUN);')
-        self.esa.RunScriptCommand(f'DeleteState(USER,{statename});')
+        with self.esa.script_batch():
+            self.esa.RunScriptCommand('EnterMode(RUN);')
+            self.esa.RunScriptCommand(f'DeleteState(USER,{statename});')
                 
     '''
     Depricated until .upload removed
@@ -35,3 +35,7 @@ class GeneratorLimitException(PowerFlowException):
 class GICException(Exception):
     pass 
 
+''' Pool Exceptions '''
+
+# Defined with the pool, which does not depend on the workbench
+from ...pool import WorkerCrashException
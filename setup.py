@@ -1,7 +1,28 @@
 import setuptools
 import os
+import platform
 import re
 
+# The pythran backend of the N-2 bounding kernels (see gridwb/_bound.py)
+# is compiled from gridwb/_performance.py into performance<major><minor>
+# when pythran is installed. Without it, the numba or NumPy kernels are
+# used.
+try:
+    from pythran.dist import PythranBuildExt, PythranExtension
+except ImportError:
+    ext_modules, cmdclass = [], {}
+else:
+    major, minor = platform.python_version_tuple()[:2]
+    ext_modules = [
+        PythranExtension(
+            "gridwb.performance{}{}".format(major, minor),
+            sources=[os.path.join("gridwb", "_performance.py")],
+            extra_compile_args=["-fopenmp"],
+            extra_link_args=["-fopenmp"],
+        )
+    ]
+    cmdclass = {"build_ext": PythranBuildExt}
+
 with open("VERSION", "r") as fh:
     __version__ = fh.read()
 
@@ -52,7 +73,9 @@ setuptools.setup(
     author="Adam Birchfield, Luke Lowery",
     author_email="abirchfield@tamu.edu, wyattluke.lowery@tamu.edu",
     url="GITLINKHERE",
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=["tests", "tests.*"]),
+    ext_modules=ext_modules,
+    cmdclass=cmdclass,
     include_package_data=True,
     classifiers=[
         "Programming Language :: Python :: 3 :: Only",
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import unittest
+
+import pandas as pd
+
+from gridwb import AsyncSAW
+from gridwb.saw import SAW
+
+from gridwb.testing import FakeSimAuto
+
+
+class AsyncSAWTestCase(unittest.TestCase):
+    def setUp(self):
+        self.fake = FakeSimAuto()
+        self.threads = []
+        fake, threads = self.fake, self.threads
+
+        def dispatch(name):
+            threads.append(threading.get_ident())
+            return fake
+
+        self.dispatch = dispatch
+
+    def run_async(self, coro):
+        return asyncio.run(coro)
+
+    def test_methods_run_on_com_thread(self):
+        async def main():
+            async with await AsyncSAW.create(
+                "case.pwb", dispatch=self.dispatch, metadata_cache=False
+            ) as saw:
+                df = await saw.GetParametersMultipleElement("bus", ["BusNum"])
+                thread = await saw.run(lambda s: threading.get_ident())
+                return df, thread
+
+        df, thread = self.run_async(main())
+        self.assertEqual(df["BusNum"].tolist(), [1, 2, 3, 4, 5, 6])
+        # The SAW was created, and is used, on the same worker thread
+        self.assertEqual(self.threads, [thread])
+        self.assertNotEqual(thread, threading.get_ident())
+        self.assertEqual(self.fake.calls[-1], ("CloseCase",))
+
+    def test_attributes_are_awaitable(self):
+        async def main():
+            async with await AsyncSAW.create(
+                "case.pwb", dispatch=self.dispatch, metadata_cache=False
+            ) as saw:
+                pending = saw.pw_order
+                # Reading an attribute does not block the event loop
+                self.assertTrue(asyncio.iscoroutine(pending))
+                return await pending
+
+        self.assertFalse(self.run_async(main()))
+
+    def test_context_managers_and_generators(self):
+        script_threads = []
+        run_script = self.fake.RunScriptCommand
+
+        def record(Statements):
+            script_threads.append(threading.get_ident())
+            return run_script(Statements)
+
+        self.fake.RunScriptCommand = record
+        ctg = pd.DataFrame({"Name": ["A", "B", "C"]})
+        ctg_ele = pd.DataFrame(
+            {"Contingency": ["A", "B", "C"], "Object": "BRANCH 1 2 1", "Action": "OPEN"}
+        )
+
+        async def main():
+            async with await AsyncSAW.create(
+                "case.pwb", dispatch=self.dispatch, metadata_cache=False
+            ) as saw:
+                async with saw.script_batch():
+                    await saw.RunScriptCommand("EnterMode(RUN);")
+                    await saw.RunScriptCommand("StoreState(A);")
+                    queued = list(self.fake.scripts)
+                async with saw.ctg_solve_chunks(ctg, ctg_ele, chunk=2) as chunks:
+                    names = [result["Name"].tolist() async for result in chunks]
+                return queued, names
+
+        queued, names = self.run_async(main())
+        self.assertEqual(queued, [])
+        self.assertEqual(self.fake.scripts[0], "EnterMode(RUN);\nStoreState(A);")
+        self.assertEqual(names, [["A", "B"], ["C"]])
+        # Every statement, of the batch and of the chunks, ran on the
+        # thread the SAW was created on
+        self.assertEqual(set(script_threads), set(self.threads))
+
+    def test_closed(self):
+        async def main():
+            saw = await AsyncSAW.create(
+                "case.pwb", dispatch=self.dispatch, metadata_cache=False
+            )
+            await saw.close()
+            with self.assertRaises(AttributeError):
+                saw.GetParametersMultipleElement
+
+        self.run_async(main())
+
+    def test_saw_with_dispatch(self):
+        saw = SAW("case.pwb", dispatch=self.dispatch, metadata_cache=False)
+        self.assertIs(saw._pwcom, self.fake)
+        saw.exit()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+
+from gridwb import _bound
+
+
+def random_inputs(n: int = 30, rows: int = 7, seed: int = 0):
+    """Random bounding inputs with a few NaN entries in every array."""
+    rng = np.random.default_rng(seed)
+
+    def draw(*shape):
+        values = rng.normal(size=shape)
+        values.flat[rng.choice(values.size, max(values.size // 20, 1), replace=False)] = np.nan
+        return values
+
+    return {
+        "A": draw(n, n),
+        "bp": draw(n, n),
+        "bn": draw(n, n),
+        "vectors": [draw(n) for _ in range(8)],
+        "start": n - rows - 2,
+        "rows": rows,
+    }
+
+
+class BackendTestCase(unittest.TestCase):
+    """Every available backend gives the same bounds as the NumPy
+    kernels, NaN included."""
+
+    def backends(self):
+        for backend in _bound.BACKENDS:
+            try:
+                yield backend, _bound._load(backend)
+            except ImportError:
+                continue
+
+    def assertSame(self, result, expected, backend, kernel):
+        np.testing.assert_array_equal(
+            result, expected, err_msg=f"{kernel} of the {backend} backend"
+        )
+
+    def test_kernels_match_numpy(self):
+        reference = _bound._NumPy
+        for dtype in (np.float64, np.float32):
+            data = random_inputs()
+            A, bp, bn = (data[k].astype(dtype) for k in ("A", "bp", "bn"))
+            v = [x.astype(dtype) for x in data["vectors"]]
+            start, rows = data["start"], data["rows"]
+            n = A.shape[0]
+            for backend, module in self.backends():
+                with self.subTest(backend=backend, dtype=dtype):
+                    expected = reference.initialize_bound(*v[:4], A)
+                    result = module.initialize_bound(*v[:4], A)
+                    for r, e in zip(result, expected):
+                        self.assertSame(r, e, backend, "initialize_bound")
+                    Wbuf1, Wbuf2 = expected[1], expected[2]
+
+                    self.assertSame(
+                        module.calculate_bound(bp, bn, v[0], v[1], Wbuf1, Wbuf2),
+                        reference.calculate_bound(bp, bn, v[0], v[1], Wbuf1, Wbuf2),
+                        backend,
+                        "calculate_bound",
+                    )
+
+                    W, expected_W = np.empty((rows, n), dtype), np.empty((rows, n), dtype)
+                    module.pair_bound(A, *v[:4], start, W)
+                    reference.pair_bound(A, *v[:4], start, expected_W)
+                    self.assertSame(W, expected_W, backend, "pair_bound")
+
+                    module.line_bound(bp, bn, *v, start, W)
+                    reference.line_bound(bp, bn, *v, start, expected_W)
+                    self.assertSame(W, expected_W, backend, "line_bound")
+
+    def test_nan_propagates(self):
+        A = np.ones((3, 3))
+        A[1, 2] = np.nan
+        ones = np.ones(3)
+        for backend, module in self.backends():
+            with self.subTest(backend=backend):
+                w = module.initialize_bound(ones, ones, ones, ones, A)[0]
+                self.assertTrue(np.isnan(w[1, 2]) and np.isnan(w[2, 1]))
+                self.assertEqual(np.count_nonzero(np.isnan(w)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,219 @@
+import contextlib
+import io
+import itertools
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+import numpy as np
+from scipy.sparse import csc_matrix, csr_matrix, issparse
+from scipy.sparse.csgraph import connected_components
+
+from gridwb import _contingency
+from gridwb._contingency import (
+    n2_enumerate,
+    n2_enumerate_shared,
+    nk_screen,
+    stream_n1,
+    stream_n2,
+)
+from gridwb.sensitivity import SensitivityMatrix
+
+from gridwb.testing import make_saw
+
+
+def _failing_initializer(specs):
+    raise ImportError("worker cannot start")
+
+
+def synthetic_lodf(n: int, seed: int = 0):
+    """(branch x outage) LODF with a -1 diagonal, flows and limits such
+    that a few percent of the pairs violate."""
+    rng = np.random.default_rng(seed)
+    lodf = rng.normal(scale=0.05, size=(n, n))
+    np.fill_diagonal(lodf, -1)
+    f = rng.normal(scale=50, size=n)
+    lim = np.abs(f) * 1.3 + 20
+    return lodf, f, lim
+
+
+class N2EnumerateSharedTestCase(unittest.TestCase):
+    def test_matches_n2_enumerate(self):
+        lodf, f, lim = synthetic_lodf(80)
+        A0 = ~np.eye(80, dtype=bool)
+        A0[3, :] = A0[:, 3] = False
+        expected, singular = n2_enumerate(lodf, f, lim, A0, progress=False)
+        self.assertGreater(expected.shape[0], 0)
+        result, shared_singular = n2_enumerate_shared(
+            lodf, f, lim, A0, nworkers=2, progress=False
+        )
+        np.testing.assert_array_equal(result, expected)
+        self.assertEqual(shared_singular, singular)
+
+    def test_dead_worker_raises(self):
+        lodf, f, lim = synthetic_lodf(20)
+        A0 = ~np.eye(20, dtype=bool)
+        with mock.patch.object(_contingency, "_attach_shared", _failing_initializer):
+            with self.assertRaises(BrokenProcessPool):
+                n2_enumerate_shared(lodf, f, lim, A0, nworkers=2, progress=False)
+
+
+def _as_sets(records):
+    return [(tuple(c), list(b), list(np.round(x, 9))) for c, b, x in records]
+
+
+class StreamTestCase(unittest.TestCase):
+    def test_sparse_lodf(self):
+        lodf, f, lim = synthetic_lodf(40)
+        lim = np.abs(f) * 1.05 + 2
+        A0 = ~np.eye(40, dtype=bool)
+        # stream_n1 takes outages as rows, stream_n2 as columns
+        expected_n1 = _as_sets(stream_n1(lodf.T, f, lim))
+        expected_n2 = _as_sets(stream_n2(lodf, f, lim, A0))
+        self.assertTrue(expected_n1 and expected_n2)
+        for sparse in (csr_matrix(lodf), SensitivityMatrix(lodf, tol=0)):
+            n1 = stream_n1(sparse.T if issparse(sparse) else sparse, f, lim)
+            self.assertEqual(_as_sets(n1), expected_n1)
+            self.assertEqual(_as_sets(stream_n2(sparse, f, lim, A0)), expected_n2)
+
+    def test_near_singular_pair(self):
+        lodf, f, lim = synthetic_lodf(30)
+        # det = 1 - lodf[i, j] * lodf[j, i] is 1e-12, not exactly zero
+        lodf[4, 9] = 0.8
+        lodf[9, 4] = (1 - 1e-12) / 0.8
+        A0 = ~np.eye(30, dtype=bool)
+        islanding = nk_screen(lodf, f, lim, [(4, 9)])[2]
+        self.assertTrue(islanding[0])
+        for jit in (True, False):
+            pairs, singular = n2_enumerate(lodf, f, lim, A0, jit=jit, progress=False)
+            self.assertEqual(singular, 1)
+            self.assertNotIn((4, 9), {(i, j) for i, j, _ in pairs.tolist()})
+            streamed = [tuple(c) for c, _, _ in stream_n2(lodf, f, lim, A0, jit=jit)]
+            self.assertNotIn((4, 9), streamed)
+
+
+class DCGrid:
+    """Small DC network: a ring-and-chord core of buses 0-5, bus 6 fed by
+    two branches (5-6, 4-6) and bus 7 hanging off bus 6 by a single one."""
+
+    fr = np.array([0, 1, 2, 3, 4, 0, 1, 2, 3, 5, 4, 6])
+    to = np.array([1, 2, 3, 4, 5, 2, 3, 4, 5, 6, 6, 7])
+    x = np.array([0.05, 0.06, 0.05, 0.07, 0.05, 0.08, 0.06, 0.09, 0.07, 0.04, 0.05, 0.03])
+    # Injections, balanced by the slack bus 0
+    p = np.array([0.0, 40.0, -60.0, 25.0, -35.0, 30.0, -20.0, -15.0])
+
+    def __init__(self):
+        self.p = self.p.copy()
+        self.p[0] = -self.p[1:].sum()
+        self.nbus = len(self.p)
+
+    def flows(self, out=()):
+        """Flows with the branches in out removed, or None if the
+        remaining network is not connected."""
+        closed = np.setdiff1d(np.arange(len(self.fr)), out)
+        graph = csr_matrix(
+            (np.ones(len(closed)), (self.fr[closed], self.to[closed])),
+            shape=(self.nbus, self.nbus),
+        )
+        if connected_components(graph, directed=False)[0] > 1:
+            return None
+        f = np.zeros(len(self.fr))
+        f[closed] = self._ptdf(closed) @ self.p
+        return f
+
+    def _ptdf(self, closed):
+        Cft = np.zeros((len(closed), self.nbus))
+        Cft[np.arange(len(closed)), self.fr[closed]] = 1
+        Cft[np.arange(len(closed)), self.to[closed]] = -1
+        Bf = Cft / self.x[closed, None]
+        ptdf = np.zeros((len(closed), self.nbus))
+        ptdf[:, 1:] = Bf[:, 1:] @ np.linalg.inv((Cft.T @ Bf)[1:, 1:])
+        return ptdf
+
+    def lodf(self):
+        """(branch x outage) LODF with a -1 diagonal, zero columns for the
+        outages that island the system, and the mask of those outages."""
+        n = len(self.fr)
+        Cft = np.zeros((n, self.nbus))
+        Cft[np.arange(n), self.fr] = 1
+        Cft[np.arange(n), self.to] = -1
+        H = self._ptdf(np.arange(n)) @ Cft.T
+        div = 1 - np.diag(H)
+        isl = np.abs(div) < 1e-10
+        lodf = np.where(isl, 0, H / np.where(isl, 1, div))
+        np.fill_diagonal(lodf, -1)
+        return lodf, isl
+
+
+class NkScreenTestCase(unittest.TestCase):
+    def setUp(self):
+        self.grid = DCGrid()
+        self.lodf, self.isl = self.grid.lodf()
+        self.f = self.grid.flows()
+        self.lim = np.abs(self.f) * 1.4 + 5
+        n = len(self.f)
+        self.sets = [
+            s for k in (1, 2, 3) for s in itertools.combinations(range(n), k)
+        ]
+
+    def brute_force(self, monitored):
+        """Counts, margins, islanding and violations from the flows of the
+        network with every set removed."""
+        counts, margins, islanding, violated = [], [], [], []
+        for s in self.sets:
+            f = self.grid.flows(s)
+            islanding.append(f is None)
+            if f is None:
+                f = np.zeros_like(self.f)
+            loading = np.abs(f[monitored]) / self.lim[monitored]
+            violated.append(loading > 1)
+            counts.append(np.sum(loading > 1))
+            margins.append(loading.max())
+        return tuple(map(np.array, (counts, margins, islanding, violated)))
+
+    def test_matches_brute_force(self):
+        bus7, bus6 = (11,), (9, 10)
+        self.assertEqual(np.flatnonzero(self.isl).tolist(), list(bus7))
+        for monitored in (None, np.array([1, 4, 6, 9, 10])):
+            mon = np.arange(len(self.f)) if monitored is None else monitored
+            counts, margins, islanding, violated = self.brute_force(mon)
+            self.assertTrue(islanding[self.sets.index(bus6)])
+            self.assertGreater(np.sum(counts[~islanding] > 0), 5)
+            for name, lodf in (
+                ("dense", self.lodf),
+                ("csc", csc_matrix(self.lodf)),
+                ("SensitivityMatrix", SensitivityMatrix(self.lodf, tol=0)),
+            ):
+                with self.subTest(name, monitored=monitored is not None):
+                    result = nk_screen(
+                        lodf, self.f, self.lim, self.sets, self.isl, monitored
+                    )
+                    np.testing.assert_array_equal(result[2], islanding)
+                    ok = ~islanding
+                    np.testing.assert_array_equal(result[0][ok], counts[ok])
+                    np.testing.assert_array_equal(result[0][islanding], 0)
+                    np.testing.assert_allclose(result[1][ok], margins[ok], rtol=1e-9)
+                    np.testing.assert_array_equal(
+                        result[3].toarray()[ok], violated[ok]
+                    )
+
+    def test_nk_fast(self):
+        counts, _, islanding, violated = self.brute_force(np.arange(len(self.f)))
+        saw = make_saw()[0]
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                secure, result, isl, matrix = saw.nk_fast(
+                    self.sets, self.lodf, self.f, self.lim, self.isl.astype(int)
+                )
+        finally:
+            saw.exit()
+        self.assertFalse(secure)
+        np.testing.assert_array_equal(isl, islanding)
+        np.testing.assert_array_equal(result[~islanding], counts[~islanding])
+        np.testing.assert_array_equal(
+            matrix.toarray()[~islanding], violated[~islanding]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+import numpy as np
+from gridwb.saw import _read_matlab_sparse
+from gridwb.testing import legacy_read_matlab_sparse, random_ybus, write_matlab_sparse
+
+
+class ReadMatlabSparseTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".m")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def assertSameAsLegacy(self, name, dtype):
+        expected = legacy_read_matlab_sparse(self.path, name, dtype)
+        result = _read_matlab_sparse(self.path, name, dtype)
+        self.assertEqual(result.shape, expected.shape)
+        self.assertEqual(result.dtype, expected.dtype)
+        np.testing.assert_array_equal(result.toarray(), expected.toarray())
+        return result
+
+    def test_ybus(self):
+        ybus = random_ybus(50)
+        write_matlab_sparse(self.path, "Ybus", ybus)
+        result = self.assertSameAsLegacy("Ybus", complex)
+        np.testing.assert_allclose(result.toarray(), ybus.toarray(), atol=1e-6)
+
+    def test_jacobian(self):
+        jac = random_ybus(40, seed=1).real
+        write_matlab_sparse(self.path, "Jac", jac)
+        self.assertSameAsLegacy("Jac", float)
+
+    def test_unexpected_statement(self):
+        # A statement that is not an entry sends the parser to the
+        # regular expression path, which skips it like the old parser
+        write_matlab_sparse(self.path, "Ybus", random_ybus(20), "% comment x;\n")
+        self.assertSameAsLegacy("Ybus", complex)
+
+    def test_small_chunks(self):
+        # Chunks end after a complete statement; only the one holding the
+        # comment is matched with the regular expression
+        write_matlab_sparse(self.path, "Ybus", random_ybus(50), "% comment x;\n")
+        with mock.patch("gridwb.saw._MATLAB_CHUNK", 256):
+            self.assertSameAsLegacy("Ybus", complex)
+
+    def test_large_file(self):
+        # 1.25M entries: the parser holds about as much memory as the
+        # file size at its peak, the regular expression one seven times
+        ybus = random_ybus(250000)
+        write_matlab_sparse(self.path, "Ybus", ybus)
+        tracemalloc.start()
+        try:
+            result = _read_matlab_sparse(self.path, "Ybus", complex)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertGreater(result.nnz, 10**6)
+        self.assertLess(peak, 2 * os.path.getsize(self.path))
+        self.assertLess(abs(result - ybus).max(), 1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from gridwb import SensitivityMatrix
+
+from gridwb.testing import make_saw
+from .test_contingency import synthetic_lodf
+
+
+def baseline_n1_fast(c1_isl, count, lodf, f, lim):
+    """The n1_fast loop before n1_screen, one outage (row) at a time."""
+    ctg = np.zeros(count, dtype=int)
+    violations = np.zeros(count, dtype=int)
+    margins = np.zeros(count)
+    for i in range(count):
+        if c1_isl[i] == 0:
+            flows = f + lodf[i, :] * f[i]
+            violating_lines = abs(flows) > lim
+            margins = np.maximum(margins, abs(flows) / lim)
+            if np.sum(violating_lines):
+                ctg[i] = 1
+                violations[violating_lines] += 1
+    if np.sum(ctg):
+        return False, margins, ctg, violations
+    return True, None, None, None
+
+
+class N1FastTestCase(unittest.TestCase):
+    def setUp(self):
+        self.saw, _ = make_saw()
+        # 10 of the 58 screened outages violate
+        self.lodf, self.f, self.lim = synthetic_lodf(60, seed=3)
+        self.lim *= 0.7
+        self.c1_isl = np.zeros(60)
+        self.c1_isl[[4, 17]] = 1
+
+    def tearDown(self):
+        self.saw.exit()
+
+    def n1_fast(self, lodf, lim):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.saw.n1_fast(self.c1_isl, 60, lodf, self.f, lim)
+
+    def test_matches_baseline(self):
+        for lim in (self.lim, self.lim / 0.7):
+            expected = baseline_n1_fast(self.c1_isl, 60, self.lodf, self.f, lim)
+            for numba in (True, False):
+                with self.subTest(secure=expected[0], numba=numba), mock.patch(
+                    "gridwb._contingency.use_numba", numba
+                ):
+                    result = self.n1_fast(self.lodf, lim)
+                    self.assertEqual(result[0], expected[0])
+                    for r, e in zip(result[1:], expected[1:]):
+                        np.testing.assert_array_equal(r, e)
+
+    def test_sparse_lodf(self):
+        # Factors at or below 0.03 dropped, as a thresholded matrix would be
+        lodf = np.where(np.abs(self.lodf) > 0.03, self.lodf, 0)
+        expected = self.n1_fast(lodf, self.lim)
+        self.assertFalse(expected[0])
+        for name, sparse in (
+            ("csr", csr_matrix(lodf)),
+            ("SensitivityMatrix", SensitivityMatrix(self.lodf, tol=0.03, transpose=True)),
+        ):
+            with self.subTest(name):
+                result = self.n1_fast(sparse, self.lim)
+                self.assertEqual(result[0], expected[0])
+                for r, e in zip(result[1:], expected[1:]):
+                    np.testing.assert_allclose(r, e, rtol=1e-12)
+
+
+class N2FastTestCase(unittest.TestCase):
+    def setUp(self):
+        self.saw, _ = make_saw()
+        self.lodf, self.f, self.lim = synthetic_lodf(60, seed=3)
+        self.lim *= 0.8
+        self.c1_isl = np.zeros(60)
+
+    def tearDown(self):
+        self.saw.exit()
+
+    def n2_fast(self, lodf):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.saw.n2_fast(self.c1_isl, 60, lodf, self.f, self.lim.copy())
+
+    def test_sparse_lodf(self):
+        secure, expected = self.n2_fast(self.lodf)
+        self.assertFalse(secure)
+        for lodf in (
+            csr_matrix(self.lodf),
+            SensitivityMatrix(self.lodf, tol=0),
+        ):
+            secure, result = self.n2_fast(lodf)
+            self.assertFalse(secure)
+            np.testing.assert_array_equal(result, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import threading
+import unittest
+
+from gridwb.pool import ScenarioPool, ThreadBackend, WorkerCrashException
+
+
+class StubSAW:
+    def __init__(self, closed):
+        self.closed = closed
+
+    def exit(self):
+        self.closed.append(threading.current_thread().name)
+
+
+class StubIO:
+    def __init__(self, closed):
+        self.esa = StubSAW(closed)
+
+
+def double(io, item):
+    return 2 * item
+
+
+class CrashingThreadBackend(ThreadBackend):
+    """Worker threads end quietly on SystemExit, standing in for a
+    worker process that dies."""
+
+    class Process(ThreadBackend.Process):
+        def run(self):
+            try:
+                super().run()
+            except SystemExit:
+                pass
+
+
+# Items that already crashed a worker once
+crashed = set()
+
+
+def crash_once(io, item):
+    if item == 3 and item not in crashed:
+        crashed.add(item)
+        raise SystemExit
+    return 2 * item
+
+
+def crash_on_two(io, item):
+    if item == 2:
+        raise SystemExit
+    return 2 * item
+
+
+class ScenarioPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.closed = []
+
+    def pool(self, **kwargs):
+        return ScenarioPool(
+            "case.pwb",
+            nworkers=2,
+            opener=lambda fname: StubIO(self.closed),
+            backend=CrashingThreadBackend,
+            **kwargs,
+        )
+
+    def join(self, pool):
+        for proc, _ in pool._workers:
+            proc.join(timeout=5)
+
+    def test_close_exits_every_worker(self):
+        with self.pool() as pool:
+            self.assertEqual(pool.map(double, range(5)), [0, 2, 4, 6, 8])
+            self.assertEqual(self.closed, [])
+        self.assertEqual(len(self.closed), 2)
+
+    def test_restart_exits_the_replaced_worker(self):
+        pool = self.pool()
+        try:
+            results = pool.imap(double, range(5))
+            next(results)
+            # Abandoning the iteration restarts the busy workers
+            results.close()
+            self.assertGreater(pool.restarts, 0)
+            for _ in range(50):
+                if len(self.closed) >= pool.restarts:
+                    break
+                threading.Event().wait(0.1)
+            self.assertEqual(len(self.closed), pool.restarts)
+        finally:
+            pool.close()
+        self.assertEqual(len(self.closed), pool.restarts + 2)
+
+    def test_crashed_worker_is_restarted(self):
+        crashed.clear()
+        with self.pool() as pool:
+            self.assertEqual(pool.map(crash_once, range(6)), [0, 2, 4, 6, 8, 10])
+            self.assertEqual(crashed, {3})
+            self.assertEqual(pool.restarts, 1)
+            # The crashed worker's SimAuto instance was still exited
+            self.assertEqual(len(self.closed), 1)
+        self.assertEqual(len(self.closed), 3)
+
+    def test_retry_limit(self):
+        with self.pool(retries=2) as pool:
+            results = pool.imap(crash_on_two, range(4))
+            self.assertEqual([next(results), next(results)], [0, 2])
+            with self.assertRaisesRegex(WorkerCrashException, "item 2"):
+                next(results)
+            # The first attempt and both retries crashed a worker
+            self.assertEqual(pool.restarts, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+
+import numpy as np
+
+try:
+    from gridwb.workbench.core.powerworld import PowerWorldIO
+except ImportError as e:  # pragma: no cover
+    # gridwb.workbench needs the generated grid.components module
+    raise unittest.SkipTest(f"gridwb.workbench is not importable: {e}")
+
+from gridwb.testing import make_saw
+
+
+class Bus:
+    TYPE = "Bus"
+    keys = ["BusNum"]
+    fields = ["BusNum", "BusName", "BusPUVolt", "BusAngle"]
+
+
+class PowerWorldIOTestCase(unittest.TestCase):
+    def setUp(self):
+        self.saw, self.fake = make_saw()
+        self.io = PowerWorldIO("case.pwb")
+        self.io.esa = self.saw
+
+    def tearDown(self):
+        self.saw.exit()
+
+    def reads(self):
+        return sum(c[0] == "GetParametersMultipleElement" for c in self.fake.calls)
+
+    def writes(self):
+        return [c[2:] for c in self.fake.calls if c[0] == "ChangeParametersMultipleElement"]
+
+    def test_cache(self):
+        volts = self.io[Bus, "BusPUVolt"]
+        volts["BusPUVolt"] = 0
+        # Served from the cache, and as a copy
+        self.assertEqual(self.io[Bus, "BusPUVolt"]["BusPUVolt"].tolist(), [1.0] * 6)
+        self.assertEqual(self.reads(), 1)
+        # Fields read separately are merged into one cached frame
+        self.io[Bus, "BusName"]
+        df = self.io[Bus, ["BusName", "BusPUVolt"]]
+        self.assertEqual(df.columns.tolist(), ["BusNum", "BusName", "BusPUVolt"])
+        self.assertEqual(self.reads(), 2)
+        self.assertEqual(self.io.cache_info(), {"hits": 2, "misses": 2, "types": 1})
+        self.io.invalidate()
+        self.io[Bus, "BusPUVolt"]
+        self.assertEqual(self.reads(), 3)
+
+    def test_generation_invalidates(self):
+        self.io[Bus, "BusPUVolt"]
+        self.saw.RunScriptCommand("SolvePowerFlow;")
+        self.fake.data["bus"]["BusPUVolt"][0] = "1.050000"
+        self.assertEqual(self.io[Bus, "BusPUVolt"]["BusPUVolt"].iloc[0], 1.05)
+        self.assertEqual(self.reads(), 2)
+        # Writes change the case as well
+        self.io[Bus, "BusPUVolt"] = 0.98
+        self.assertEqual(self.io[Bus, "BusPUVolt"]["BusPUVolt"].tolist(), [0.98] * 6)
+
+    def test_write_sends_keys_and_assigned_fields(self):
+        volts = self.io[Bus, "BusPUVolt"]
+        self.io[Bus, volts["BusNum"] > 4, "BusPUVolt"] = 1.01
+        (write,) = self.writes()
+        self.assertEqual(write, (["BusNum", "BusPUVolt"], [[5, 1.01], [6, 1.01]]))
+        self.assertEqual(self.fake.scripts, ["EnterMode(EDIT);", "EnterMode(RUN);"])
+
+    def test_batch_merges_writes(self):
+        with self.io.batch():
+            self.io[Bus, "BusPUVolt"] = np.arange(6) / 100 + 1
+            self.io[Bus, "BusAngle"] = 0.5
+            self.io[Bus, "BusPUVolt"] = 1.0
+            self.assertEqual(self.writes(), [])
+        (write,) = self.writes()
+        params, values = write
+        self.assertEqual(params, ["BusNum", "BusPUVolt", "BusAngle"])
+        self.assertEqual(values, [[i, 1.0, 0.5] for i in range(1, 7)])
+        self.assertEqual(self.fake.scripts, ["EnterMode(EDIT);", "EnterMode(RUN);"])
+
+    def test_batch_merges_record_subsets(self):
+        keys = self.io[Bus]
+        with self.io.batch():
+            self.io[Bus, "BusPUVolt"] = 1.0
+            self.io[Bus, keys["BusNum"] == 2, "BusPUVolt"] = 1.02
+        (write,) = self.writes()
+        self.assertEqual(write[1][1], [2, 1.02])
+        self.assertEqual(len(write[1]), 6)
+
+    def test_read_inside_batch_sees_writes(self):
+        with self.io.batch():
+            self.io[Bus, "BusPUVolt"] = 1.03
+            self.assertEqual(self.io[Bus, "BusPUVolt"]["BusPUVolt"].tolist(), [1.03] * 6)
+            self.assertEqual(len(self.writes()), 1)
+            self.io[Bus, "BusAngle"] = 0.0
+        self.assertEqual(len(self.writes()), 2)
+
+    def test_batch_discards_on_exception(self):
+        with self.assertRaises(KeyError):
+            with self.io.batch():
+                self.io[Bus, "BusPUVolt"] = 0.9
+                raise KeyError("failed")
+        self.assertEqual(self.writes(), [])
+        self.assertEqual(self.fake.scripts, ["EnterMode(EDIT);", "EnterMode(RUN);"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import datetime
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from gridwb.results import ResultStore
+
+LABELS = [f"{i} {i + 1} 1" for i in range(1, 9)]
+
+
+def make_records(seed: int, count: int = 12):
+    """Random (contingency, violated branches, loading) records over the
+    positions of LABELS."""
+    rng = np.random.default_rng(seed)
+    records = []
+    for _ in range(count):
+        contingency = tuple(rng.choice(8, size=rng.integers(1, 3), replace=False))
+        branches = np.sort(rng.choice(8, size=rng.integers(1, 4), replace=False))
+        records.append((contingency, branches, 1 + rng.random(branches.size)))
+    return records
+
+
+def expected_frame(run, records, labels, lim):
+    rows = []
+    for contingency, branches, loading in records:
+        name = " & ".join(sorted((labels[c] for c in contingency), key=LABELS.index))
+        for b, x in zip(branches, loading):
+            rows.append((run, name, labels[b], x * lim[b], lim[b], x * 100))
+    columns = ["run", "contingency", "branch", "flow", "limit", "loading"]
+    return pd.DataFrame(rows, columns=columns)
+
+
+class ResultStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.lim = np.arange(1, 9) * 10.0
+        self.records = [make_records(0), make_records(1)]
+        # The second run sees the branches in another order
+        self.labels = [LABELS, LABELS[::-1]]
+        with ResultStore(self.tmp.name, chunk_size=7) as store:
+            for run, (records, labels) in enumerate(zip(self.records, self.labels)):
+                store.start_run(
+                    f"run{run}", "N-2", datetime.datetime(2024, 1, run + 1)
+                )
+                store.append(records, labels, self.lim)
+        self.expected = pd.concat(
+            [
+                expected_frame(run, records, labels, self.lim)
+                for run, (records, labels) in enumerate(zip(self.records, self.labels))
+            ],
+            ignore_index=True,
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assertRecords(self, df, expected):
+        keys = ["run", "contingency", "branch"]
+        df = df.sort_values(keys).reset_index(drop=True)
+        expected = expected.sort_values(keys).reset_index(drop=True)
+        pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+    def test_round_trip(self):
+        store = ResultStore(self.tmp.name)
+        runs = store.runs()
+        self.assertEqual(runs["label"].tolist(), ["run0", "run1"])
+        counts = self.expected["run"].value_counts().sort_index()
+        self.assertEqual(runs["records"].tolist(), counts.tolist())
+        self.assertEqual(runs["time"].iloc[1], pd.Timestamp(2024, 1, 2))
+        # Several chunks per run
+        self.assertGreater(len(store.catalog["chunks"]), 2)
+        self.assertRecords(store.query(), self.expected)
+        self.assertRecords(store.query(runs=1), self.expected[self.expected["run"] == 1])
+
+    def test_query_filters(self):
+        store = ResultStore(self.tmp.name)
+        name = self.expected["contingency"].iloc[0]
+        branch = self.expected["branch"].iloc[0]
+        for kwargs, mask in (
+            ({"contingency": name.split(" & ")}, self.expected["contingency"] == name),
+            ({"branch": branch}, self.expected["branch"] == branch),
+            (
+                {"contingency": name.split(" & ")[::-1], "branch": branch, "runs": [0]},
+                (self.expected["contingency"] == name)
+                & (self.expected["branch"] == branch)
+                & (self.expected["run"] == 0),
+            ),
+        ):
+            with self.subTest(**{k: str(v) for k, v in kwargs.items()}):
+                self.assertRecords(store.query(**kwargs), self.expected[mask])
+        self.assertTrue(store.query(contingency="unknown").empty)
+        self.assertTrue(store.query(branch="unknown").empty)
+
+    def test_append_after_reopen(self):
+        with ResultStore(self.tmp.name, chunk_size=7) as store:
+            store.start_run("run2")
+            store.append(self.records[0], LABELS, self.lim)
+        store = ResultStore(self.tmp.name)
+        self.assertEqual(len(store.runs()), 3)
+        expected = expected_frame(2, self.records[0], LABELS, self.lim)
+        self.assertRecords(store.query(runs=2), expected)
+        # Contingencies of run 0 and run 2 are the same entries
+        self.assertEqual(len(store.query(runs=[0, 2])), 2 * len(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
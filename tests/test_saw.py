@@ -0,0 +1,545 @@
+import io
+import os
+import re
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csc_matrix
+
+from gridwb.saw import SAW, COMError, Error, _LowRankLU, df_to_aux
+
+from gridwb.testing import make_saw
+
+
+class ScriptBatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.saw, self.fake = make_saw()
+
+    def tearDown(self):
+        self.saw.exit()
+
+    def test_flushes_on_exit(self):
+        with self.saw.script_batch():
+            self.saw.RunScriptCommand("EnterMode(RUN)")
+            self.saw.RunScriptCommand("StoreState(A);")
+            self.assertEqual(self.fake.scripts, [])
+        self.assertEqual(self.fake.scripts, ["EnterMode(RUN);\nStoreState(A);"])
+
+    def test_discards_on_exception(self):
+        with self.assertRaises(KeyError):
+            with self.saw.script_batch():
+                self.saw.RunScriptCommand("EnterMode(RUN);")
+                raise KeyError("failed")
+        self.assertEqual(self.fake.scripts, [])
+        # Later statements are sent right away, without the discarded ones
+        self.saw.RunScriptCommand("SolvePowerFlow;")
+        self.assertEqual(self.fake.scripts, ["SolvePowerFlow;"])
+
+
+def dense_sensitivities(fake):
+    """PTDF (in-service branches x buses) and LODF (outage x branch) of
+    the fake case, from an explicit inverse of the reduced B matrix."""
+    bus, branch = fake.data["bus"], fake.data["branch"]
+    pos = {int(b): i for i, b in enumerate(bus["BusNum"])}
+    slack = bus["BusCat"].index("Slack")
+    closed = [i for i, s in enumerate(branch["LineStatus"]) if s != "Open"]
+    nb, nl = len(pos), len(closed)
+    Cft = np.zeros((nl, nb))
+    for r, i in enumerate(closed):
+        Cft[r, pos[int(branch["BusNum"][i])]] = 1
+        Cft[r, pos[int(branch["BusNum:1"][i])]] = -1
+    Bf = Cft / np.array([float(branch["LineX"][i]) for i in closed])[:, None]
+    noslack = [i for i in range(nb) if i != slack]
+    ptdf = np.zeros((nl, nb))
+    ptdf[:, noslack] = Bf[:, noslack] @ np.linalg.inv((Cft.T @ Bf)[np.ix_(noslack, noslack)])
+    H = ptdf @ Cft.T
+    div = 1 - np.diag(H)
+    # Outages that island the system get zero factors
+    lodf = np.where(np.abs(div) > 1e-10, H / np.where(div == 0, 1, div), 0).T
+    np.fill_diagonal(lodf, -1)
+    return ptdf, lodf
+
+
+class SensitivityTestCase(unittest.TestCase):
+    def setUp(self):
+        # Bus 6 is connected by branches 5 (5-6) and 9 (4-6)
+        self.saw, self.fake = make_saw()
+
+    def tearDown(self):
+        self.saw.exit()
+
+    def open_branch(self, i, status="Open"):
+        branch = self.fake.data["branch"]
+        keys = ["BusNum", "BusNum:1", "LineCircuit"]
+        df = pd.DataFrame({k: [branch[k][i]] for k in keys}).assign(LineStatus=status)
+        self.saw.change_parameters_multiple_element_df("branch", df)
+
+    def test_shift_factors(self):
+        isf = dense_sensitivities(self.fake)[0].T
+        np.testing.assert_allclose(self.saw.get_shift_factor_matrix_fast(), isf, atol=1e-12)
+        mask = np.zeros(9, dtype=bool)
+        mask[[0, 3, 5]] = True
+        for monitored in ([0, 3, 5], mask):
+            with self.subTest(monitored=monitored):
+                result = self.saw.get_shift_factor_matrix_fast(monitored, block_size=2)
+                np.testing.assert_allclose(result, isf[:, [0, 3, 5]], atol=1e-12)
+        result = self.saw.get_shift_factor_matrix_fast(dtype=np.float32)
+        self.assertEqual(result.dtype, np.float32)
+        np.testing.assert_allclose(result, isf, atol=1e-6)
+
+    def test_ptdf_and_lodf(self):
+        ptdf, lodf = dense_sensitivities(self.fake)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        for method, expected in (
+            (self.saw.get_ptdf_matrix_fast, ptdf),
+            (self.saw.get_lodf_matrix_fast, lodf),
+        ):
+            path = os.path.join(tmp.name, f"{method.__name__}.npy")
+            out = np.full(expected.shape, np.nan)
+            for name, kwargs in (
+                ("one block", {}),
+                # Work space for a single column per block
+                ("column blocks", {"max_memory": 1}),
+                ("array out", {"max_memory": 1, "out": out}),
+                ("memmap out", {"out": path}),
+            ):
+                with self.subTest(method=method.__name__, case=name):
+                    result = method(**kwargs)
+                    np.testing.assert_allclose(result, expected, atol=1e-12)
+            self.assertIsInstance(result, np.memmap)
+            # Both outputs were written in place
+            np.testing.assert_allclose(out, expected, atol=1e-12)
+            np.testing.assert_allclose(np.load(path), expected, atol=1e-12)
+        with self.assertRaises(ValueError):
+            self.saw.get_lodf_matrix_fast(out=np.empty((9, 6)))
+
+    def test_incremental_switching(self):
+        updated = []
+        switch_ptdf = SAW._switch_ptdf
+
+        def spy(saw, *args):
+            ptdf = switch_ptdf(saw, *args)
+            updated.append(ptdf is not None)
+            return ptdf
+
+        steps = [
+            ("open 2", [(2, "Open")], True),
+            ("close 2", [(2, "Closed")], True),
+            ("open 0", [(0, "Open")], True),
+            ("open 3", [(3, "Open")], True),
+            ("close 0, open 6", [(0, "Closed"), (6, "Open")], False),
+        ]
+        with mock.patch.object(SAW, "_switch_ptdf", spy):
+            self.saw.get_ptdf_matrix_fast(incremental=True)
+            for name, changes, rank_one in steps:
+                for i, status in changes:
+                    self.open_branch(i, status)
+                with self.subTest(name):
+                    ptdf = self.saw.get_ptdf_matrix_fast(incremental=True)
+                    np.testing.assert_allclose(
+                        ptdf, dense_sensitivities(self.fake)[0], atol=1e-12
+                    )
+                    self.assertEqual(updated[-1], rank_one)
+
+    def test_factorization_update(self):
+        self.saw.get_ptdf_matrix_fast()
+        solver = self.saw._sensitivity["solver"]
+        for i in (2, 5):
+            self.open_branch(i)
+            ptdf, lodf = dense_sensitivities(self.fake)
+            np.testing.assert_allclose(self.saw.get_ptdf_matrix_fast(), ptdf, atol=1e-12)
+            np.testing.assert_allclose(self.saw.get_lodf_matrix_fast(), lodf, atol=1e-12)
+            # Corrected with a low-rank update, not refactorized
+            self.assertIs(self.saw._sensitivity["solver"], solver)
+        self.assertEqual(solver.U.shape[1], 2)
+
+    def test_low_rank_lu(self):
+        rng = np.random.default_rng(0)
+        B = np.diag([4.0, 5, 6, 7]) - 1
+        lu = _LowRankLU(csc_matrix(B), None, None)
+        rhs = rng.normal(size=(4, 3))
+        for rank in (1, 2, 0):
+            U = rng.normal(size=(4, rank))
+            d = rng.uniform(0.5, 1, rank)
+            # Each update replaces the previous one
+            self.assertTrue(lu.set_update(U, d))
+            np.testing.assert_allclose(
+                lu.solve(rhs.copy()), np.linalg.solve(B + U @ np.diag(d) @ U.T, rhs)
+            )
+        # An update making the matrix singular is refused
+        lu = _LowRankLU(csc_matrix(np.diag([1.0, 2, 3, 4])), None, None)
+        self.assertFalse(lu.set_update(np.eye(4)[:, :1], np.array([-1.0])))
+
+    def test_islanding_raises(self):
+        self.open_branch(4)
+        self.open_branch(8)
+        for method in (
+            self.saw.get_ptdf_matrix_fast,
+            self.saw.get_lodf_matrix_fast,
+            self.saw.get_shift_factor_matrix_fast,
+        ):
+            with self.assertRaisesRegex(Error, r"island 1 bus.*6"):
+                method()
+
+    def test_incremental_islanding_raises(self):
+        self.saw.get_ptdf_matrix_fast(incremental=True)
+        self.open_branch(4)
+        ptdf = self.saw.get_ptdf_matrix_fast(incremental=True)
+        self.assertTrue(np.all(np.isfinite(ptdf)))
+        self.open_branch(8)
+        with self.assertRaisesRegex(Error, "island"):
+            self.saw.get_ptdf_matrix_fast(incremental=True)
+
+
+class StatsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.saw, self.fake = make_saw()
+        self.calls = []
+        self.saw.enable_stats(lambda *args: self.calls.append(args))
+
+    def tearDown(self):
+        self.saw.exit()
+
+    def test_payload_sizes(self):
+        self.saw.GetParametersMultipleElement("branch", ["BusNum", "BusNum:1"])
+        self.saw.ChangeParametersMultipleElement(
+            "branch", ["BusNum", "BusNum:1", "LineCircuit"], [[1, 2, "1"], [2, 3, "1"]]
+        )
+        sizes = {func: (arg, result) for func, _, arg, result, _ in self.calls}
+        # 2 fields requested, 2 fields x 9 branches returned
+        self.assertEqual(sizes["GetParametersMultipleElement"], (2, 18))
+        self.assertEqual(sizes["ChangeParametersMultipleElement"], (6, 0))
+        stats = self.saw.stats()
+        self.assertEqual(stats.loc["GetParametersMultipleElement", "count"], 1)
+        self.assertEqual(stats.loc["GetParametersMultipleElement", "result_size"], 18)
+        self.assertEqual(stats.loc["ChangeParametersMultipleElement", "arg_size"], 6)
+
+    def test_counts_and_reset(self):
+        for _ in range(3):
+            self.saw.GetParametersMultipleElement("bus", ["BusNum"])
+        row = self.saw.stats().loc["GetParametersMultipleElement"]
+        self.assertEqual((row["count"], row["errors"]), (3, 0))
+        self.assertEqual(row[[c for c in row.index if c.startswith("le_")]].sum(), 3)
+        self.assertLessEqual(row["min_time"], row["mean_time"])
+        self.assertLessEqual(row["mean_time"], row["max_time"])
+        self.saw.reset_stats()
+        self.assertTrue(self.saw.stats().empty)
+        self.saw.GetParametersMultipleElement("bus", ["BusNum"])
+        self.assertEqual(self.saw.stats()["count"].tolist(), [1])
+        self.saw.disable_stats()
+        self.saw.GetParametersMultipleElement("bus", ["BusNum"])
+        self.assertTrue(self.saw.stats().empty)
+
+    def test_errors_are_recorded(self):
+        def fail(FileName):
+            raise RuntimeError("disk full")
+
+        self.fake.SaveCase = fail
+        with self.assertRaises(COMError):
+            self.saw._call_simauto("SaveCase", "case.pwb")
+        self.assertEqual(self.calls[-1][0], "SaveCase")
+        self.assertTrue(self.calls[-1][-1])
+        self.assertEqual(self.saw.stats().loc["SaveCase", "errors"], 1)
+
+    def test_callback_errors_are_logged(self):
+        def fail(*args):
+            raise ValueError("exporter down")
+
+        self.saw.enable_stats(fail)
+        with self.assertLogs(self.saw.log, "ERROR") as logs:
+            df = self.saw.GetParametersMultipleElement("bus", ["BusNum"])
+        self.assertEqual(len(df), 6)
+        self.assertIn("stats callback", logs.output[0])
+        self.assertEqual(self.saw.stats().loc["GetParametersMultipleElement", "count"], 1)
+
+
+class LodfSubsetTestCase(unittest.TestCase):
+    def setUp(self):
+        self.saw, self.fake = make_saw()
+        self.branch = self.fake.data["branch"]
+
+    def tearDown(self):
+        self.saw.exit()
+
+    def keys(self, positions):
+        fields = ["BusNum", "BusNum:1", "LineCircuit"]
+        return pd.DataFrame({k: [self.branch[k][i] for i in positions] for k in fields})
+
+    def assertLodf(self, lodf, monitored, outages):
+        # The made-up factors of the fake server
+        expected = [[-1 if r == o else (r + o / 10) / 100 for o in outages] for r in monitored]
+        np.testing.assert_allclose(lodf, expected)
+
+    def reads(self):
+        return [c[2] for c in self.fake.calls if c[:2] == ("GetParametersMultipleElement", "branch")]
+
+    def test_key_subsets(self):
+        self.branch["Selected"][:] = ["YES", "YES"] + ["NO"] * 7
+        lodf, isl = self.saw.get_lodf_matrix(
+            monitored=self.keys([1, 4, 7]), contingencies=self.keys([0, 4])
+        )
+        self.assertLodf(lodf, [1, 4, 7], [0, 4])
+        self.assertFalse(isl.any())
+        # Only the monitored branches are read back, through the filter
+        self.assertEqual(self.reads(), [self.saw.BRANCH_SUBSET_FILTER])
+        self.assertEqual(self.fake.filters[self.saw.BRANCH_SUBSET_FILTER], ("Selected", "YES"))
+        self.assertEqual(
+            [i for i, s in enumerate(self.branch["Selected"]) if s == "YES"], [1, 4, 7]
+        )
+        # Only the branches whose Selected changed were written
+        writes = [c[3] for c in self.fake.calls if c[0] == "ChangeParametersMultipleElement"]
+        self.assertEqual([len(w) for w in writes], [2, 3])
+
+    def test_monitored_keys(self):
+        lodf, _ = self.saw.get_lodf_matrix(monitored=self.keys([2, 8]))
+        self.assertLodf(lodf, [2, 8], range(9))
+        self.assertEqual(self.reads(), [self.saw.BRANCH_SUBSET_FILTER])
+
+    def test_filter_subsets(self):
+        # Branches 1 (2-3) and 6 (2-4) start at bus 2
+        lodf, _ = self.saw.get_lodf_matrix(
+            monitored=self.keys([0, 3]), contingencies="BusNum = 2"
+        )
+        self.assertLodf(lodf, [0, 3], [1, 6])
+        lodf, _ = self.saw.get_lodf_matrix(monitored="BusNum = 2", contingencies=self.keys([5]))
+        self.assertLodf(lodf, [1, 6], [5])
+        self.assertEqual(self.reads(), [self.saw.BRANCH_SUBSET_FILTER, "BusNum = 2"])
+
+
+class CtgSolveChunksTestCase(unittest.TestCase):
+    def setUp(self):
+        self.saw, self.fake = make_saw()
+        table = self.fake.data["contingency"]
+        for name, skip in (("C1", "NO"), ("C2", "YES"), ("A", "YES")):
+            table["Name"].append(name)
+            table["Skip"].append(skip)
+            table["Solved"].append("NO")
+            table["Violations"].append("")
+        elements = self.fake.data["contingencyelement"]
+        elements["Contingency"].append("A")
+        elements["Object"].append("BRANCH 1 2 1")
+        elements["Action"].append("OPEN")
+        # "A" collides with the contingency already in the case
+        self.ctg = pd.DataFrame({"Name": ["A", "B", "C", "D", "E"]})
+        self.ctg_ele = pd.DataFrame(
+            {
+                "Contingency": ["A", "B", "C", "D", "E"],
+                "Object": [f"BRANCH 2 {i} 1" for i in range(3, 8)],
+                "Action": "OPEN",
+            }
+        )
+
+    def tearDown(self):
+        self.saw.exit()
+
+    def skip(self):
+        table = self.fake.data["contingency"]
+        return dict(zip(table["Name"], table["Skip"]))
+
+    def test_solves_chunks(self):
+        with self.saw.ctg_solve_chunks(self.ctg, self.ctg_ele, chunk=2) as chunks:
+            names = [result["Name"].tolist() for result in chunks]
+        self.assertEqual(names, [["A", "B"], ["C", "D"], ["E"]])
+        self.assertEqual(
+            self.skip(),
+            {"C1": "NO", "C2": "YES", "A": "YES", "B": "NO", "C": "NO", "D": "NO", "E": "NO"},
+        )
+        # Only the chunk is read back, through the advanced filter
+        reads = [
+            c[2]
+            for c in self.fake.calls
+            if c[:2] == ("GetParametersMultipleElement", "Contingency")
+        ]
+        self.assertEqual(reads, [""] + [self.saw.CTG_CHUNK_FILTER] * 3)
+        # The contingency already named "A" keeps its own element
+        elements = self.fake.data["contingencyelement"]
+        objects = [o for c, o in zip(elements["Contingency"], elements["Object"]) if c == "A"]
+        self.assertEqual(objects, ["BRANCH 1 2 1"])
+
+    def test_restores_on_early_exit(self):
+        with self.assertRaises(KeyError):
+            with self.saw.ctg_solve_chunks(self.ctg, self.ctg_ele, chunk=2) as chunks:
+                next(chunks)
+                raise KeyError("stop")
+        # C to E were never inserted
+        self.assertEqual(self.skip(), {"C1": "NO", "C2": "YES", "A": "YES", "B": "NO"})
+
+
+class DecodeColumnsTestCase(unittest.TestCase):
+    """decode_columns gives the same frame as the per-column
+    pd.to_numeric path of clean_df_or_series."""
+
+    COLUMNS = {
+        "ints": ["1", "-2", "+3"],
+        "padded": [" 1", "22 ", " 3 "],
+        "mixed": ["1", "2.5", "-3e-2"],
+        "float forms": ["1.", ".5", "1E5"],
+        "blank": ["1", "", "3"],
+        "spaces": ["1", "  ", "3"],
+        "non-numeric": ["1", "abc", "3"],
+        "infinite": ["inf", "-Infinity", "1"],
+        "nan": ["nan", "NaN", "1"],
+        "separators": ["1_000", "2", "3"],
+        "non-ascii digits": ["\u0661", "2", "3"],
+        "uint64": ["18446744073709551615", "1", "2"],
+        "too large": ["99999999999999999999", "1", "2"],
+    }
+
+    def setUp(self):
+        self.saw, _ = make_saw()
+
+    def tearDown(self):
+        self.saw.exit()
+
+    def assertDecodesLikePandas(self, column):
+        # BusNum is an Integer field, LineX a Real one
+        fields = ["BusNum", "LineX", "LineCircuit"]
+        columns = [column, column, (["1", " a ", "b"] * len(column))[: len(column)]]
+        expected = self.saw.clean_df_or_series(
+            pd.DataFrame(np.array(columns, dtype=object).T, columns=fields), "branch"
+        )
+        result = self.saw.decode_columns(columns, fields, "branch")
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_matches_to_numeric(self):
+        for name, column in self.COLUMNS.items():
+            with self.subTest(name):
+                self.assertDecodesLikePandas(column)
+
+    def test_long_columns(self):
+        # The text checks go a chunk of values at a time
+        column = [str(i) for i in range(10000)]
+        for i, value in ((9999, "1_000"), (5000, "\u0661"), (4096, "")):
+            with self.subTest(value=value):
+                self.assertDecodesLikePandas(column[:i] + [value] + column[i + 1 :])
+
+    def test_comma_delimiter(self):
+        self.saw.decimal_delimiter = ","
+        for column in (["1", "2", "3"], ["1,5", "-2,25", "3"], ["1,5", "", "x"]):
+            with self.subTest(column=column):
+                self.assertDecodesLikePandas(column)
+
+
+def read_aux_data(text: str) -> pd.DataFrame:
+    """Parse the DATA section written by df_to_aux back into strings."""
+    match = re.match(r"DATA \(\w+, \[([^\]]*)\].*?\)\s*\{(.*)\}", text, re.S)
+    header, body = match.groups()
+    token = re.compile(r'"((?:[^"]|"")*)"|(\S+)')
+    rows = [
+        [plain or quoted.replace('""', '"') for quoted, plain in token.findall(line)]
+        for line in body.strip().splitlines()
+    ]
+    return pd.DataFrame(rows, columns=header.split(","))
+
+
+class AuxFormatTestCase(unittest.TestCase):
+    def write(self, df):
+        fp = io.StringIO()
+        df_to_aux(fp, df, "Bus", create_if_not_found=False)
+        return fp.getvalue()
+
+    def test_round_trip(self):
+        df = pd.DataFrame(
+            {
+                "BusNum": [1, 2, 3],
+                "BusName": ['say "hi"', "C:\\cases\\new", "tab\there"],
+                "BusPUVolt": [1.0, 0.1 + 0.2, -1e-300],
+                "BusCat": pd.Series(["PQ", "", "Slack"], dtype=object),
+                "Enabled": [True, False, True],
+            }
+        )
+        back = read_aux_data(self.write(df))
+        self.assertEqual(back["BusName"].tolist(), df["BusName"].tolist())
+        self.assertEqual(back["BusCat"].tolist(), df["BusCat"].tolist())
+        self.assertEqual(back["BusNum"].astype(int).tolist(), [1, 2, 3])
+        self.assertEqual(back["BusPUVolt"].astype(float).tolist(), df["BusPUVolt"].tolist())
+        self.assertEqual(back["Enabled"].tolist(), ["true", "false", "true"])
+
+    def test_rejects_unwritable_values(self):
+        for column in (
+            [1.0, np.nan],
+            [np.inf, 1.0],
+            ["two\nlines", "x"],
+            ["bell\x07", "x"],
+            pd.Series(["x", None], dtype=object),
+        ):
+            with self.subTest(column=column):
+                with self.assertRaises(ValueError):
+                    self.write(pd.DataFrame({"BusNum": [1, 2], "BusName": column}))
+
+
+class ChangeParametersTestCase(unittest.TestCase):
+    def setUp(self):
+        self.saw, self.fake = make_saw()
+
+    def tearDown(self):
+        self.saw.exit()
+
+    def test_paths_reject_the_same_values(self):
+        # Whether sent as COM variants or through an aux file
+        for threshold in (np.inf, 0):
+            self.saw.AUX_CHANGE_THRESHOLD = threshold
+            for column in ([1.0, np.nan], [np.inf, 1.0], pd.Series([1.0, None], dtype=object)):
+                with self.subTest(threshold=threshold, column=column):
+                    df = pd.DataFrame({"BusNum": [1, 2], "BusPUVolt": column})
+                    with self.assertRaisesRegex(ValueError, "BusPUVolt"):
+                        self.saw.change_parameters_multiple_element_df("bus", df)
+        sent = [c[0] for c in self.fake.calls]
+        self.assertNotIn("ChangeParametersMultipleElement", sent)
+        self.assertNotIn("ProcessAuxFile", sent)
+
+    def test_paths(self):
+        df = pd.DataFrame({"BusNum": [1, 2], "BusPUVolt": [1.01, 0.99]})
+        self.saw.AUX_CHANGE_THRESHOLD = df.size + 1
+        self.saw.change_parameters_multiple_element_df("bus", df)
+        self.assertEqual(self.fake.calls[-1][0], "ChangeParametersMultipleElement")
+        self.saw.AUX_CHANGE_THRESHOLD = df.size
+        self.saw.change_parameters_multiple_element_df("bus", df)
+        self.assertEqual(self.fake.calls[-1][0], "ProcessAuxFile")
+        back = read_aux_data(self.fake.last_aux)
+        self.assertEqual(back["BusPUVolt"].astype(float).tolist(), [1.01, 0.99])
+
+
+class MetadataCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def lookup(self):
+        saw, fake = make_saw(metadata_cache=self.tmp.name)
+        try:
+            fields = saw.GetFieldList("branch")
+            keys = saw.get_key_fields_for_object_type("branch")
+        finally:
+            saw.exit()
+        calls = [c for c in fake.calls if c[0] == "GetFieldList"]
+        return fields, keys, calls
+
+    def test_round_trip(self):
+        fields, keys, calls = self.lookup()
+        self.assertEqual(len(calls), 1)
+        (name,) = os.listdir(self.tmp.name)
+        self.assertTrue(name.endswith(".json"))
+        cached_fields, cached_keys, calls = self.lookup()
+        self.assertEqual(calls, [])
+        pd.testing.assert_frame_equal(cached_fields, fields)
+        pd.testing.assert_frame_equal(cached_keys, keys)
+
+    def test_malformed_cache_is_ignored(self):
+        fields, _, _ = self.lookup()
+        (name,) = os.listdir(self.tmp.name)
+        for content in ("not json", '{"format": 2, "fields": {"branch": [1]}}'):
+            with open(os.path.join(self.tmp.name, name), "w") as fh:
+                fh.write(content)
+            with self.subTest(content=content):
+                looked_up, _, calls = self.lookup()
+                self.assertEqual(len(calls), 1)
+                pd.testing.assert_frame_equal(looked_up, fields)
+
+
+if __name__ == "__main__":
+    unittest.main()